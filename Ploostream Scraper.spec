@@ -5,8 +5,18 @@ a = Analysis(
     ['app.py'],
     pathex=[],
     binaries=[],
-    datas=[],
-    hiddenimports=[],
+    datas=[
+        ('scrapers/providers/utils/football_logos.json', 'scrapers/providers/utils'),
+        ('scrapers/providers/utils/football_logos.bin', 'scrapers/providers/utils'),
+    ],
+    # Los proveedores se importan de forma diferida desde scrapers.registry
+    hiddenimports=[
+        'scrapers.providers.kakarotfoot',
+        'scrapers.providers.tiroalpalo',
+        'scrapers.providers.kevinsport',
+        'scrapers.providers.livetv',
+        'dotenv',
+    ],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
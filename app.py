@@ -1,42 +1,64 @@
 import tkinter as tk
-from tkinter import scrolledtext
+from tkinter import scrolledtext, ttk
 import threading
+import multiprocessing
+import queue
 import datetime
 import requests
-import json
 import time
 import os
 import sys
-import shutil
 
+from scrapers.breaker import CLOSED, OPEN, breakers
+from scrapers.cancel import CancelToken
+from scrapers.probe import HEALTH_DEAD, stream_prober
+from scrapers.progress import RUN, progress
+from scrapers.publish import build_publisher
 from scrapers.service import ScraperService
-from scrapers.registry import provider_registry
-from dataclasses import asdict
+from scrapers.scheduler import RefreshScheduler
+from scrapers.snapshot import SNAPSHOT_MAX_AGE, Snapshot, SnapshotStore
+from scrapers.registry import enabled_providers, provider_registry
+from scrapers import net
+from scrapers.providers.utils.logos import load_logos
 
 VERSION_LOCAL = "1.0.2"
 VERSION_URL = "https://raw.githubusercontent.com/CastilloDevX/ploostream_server/main/version.txt"
 EXE_URL = "https://github.com/CastilloDevX/ploostream_server/releases/latest/download/PloostreamScraper.exe"
-FIREBASE_URL = "https://ploostream-db-default-rtdb.firebaseio.com/content.json"
 MIN_INTERVAL_SECONDS = 900  # 15 minutos
+RUN_DEADLINE_SECONDS = 600  # presupuesto total de una ejecución manual
+LOG_FLUSH_MS = 100          # cada cuánto vuelca Tk los mensajes pendientes
+LOG_MAX_LINES = 2000        # líneas que conserva la caja de log
+PROGRESS_REFRESH_MS = 250   # repintado de las barras de progreso
 
 # ===========================
 #   ACTUALIZACIÓN AUTOMÁTICA
 # ===========================
-def check_for_updates():
+def check_for_updates(ui_update_callback=print, on_update_ready=None):
+    # Se ejecuta en segundo plano: la ventana ya está visible mientras tanto
     try:
         version_remota = requests.get(VERSION_URL, timeout=10).text.strip()
         if version_remota == VERSION_LOCAL:
-            print("Ya estás actualizado")
+            ui_update_callback(f"✔ Versión {VERSION_LOCAL} al día")
             return
 
-        print(f"Nueva versión detectada: {version_remota}")
+        ui_update_callback(f"⬇ Nueva versión detectada: {version_remota}, descargando ...")
         exe_actual = sys.executable
         nuevo_exe = exe_actual + ".new"
 
-        with requests.get(EXE_URL, stream=True) as r:
+        with requests.get(EXE_URL, stream=True, timeout=30) as r:
             r.raise_for_status()
+            total = int(r.headers.get("Content-Length") or 0)
+            descargado = 0
+            ultimo_pct = 0
             with open(nuevo_exe, "wb") as f:
-                shutil.copyfileobj(r.raw, f)
+                for chunk in r.iter_content(chunk_size=256 * 1024):
+                    f.write(chunk)
+                    descargado += len(chunk)
+                    if total:
+                        pct = descargado * 100 // total
+                        if pct >= ultimo_pct + 10:
+                            ultimo_pct = pct - pct % 10
+                            ui_update_callback(f"   Descarga {ultimo_pct}%")
 
         updater = exe_actual + "_update.bat"
         with open(updater, "w") as f:
@@ -49,30 +71,46 @@ start "" "{exe_actual}"
 del "%~f0"
 """)
 
-        os.startfile(updater)
-        sys.exit()
+        ui_update_callback("🔁 Actualización lista, reiniciando ...")
+        if on_update_ready:
+            on_update_ready(updater)
+        else:
+            os.startfile(updater)
+            sys.exit()
 
     except Exception as e:
-        print("Error al buscar actualización:", e)
+        ui_update_callback(f"⚠ Error al buscar actualización: {e}")
+
+
+def cargar_snapshot(snapshot, ui_update_callback=print):
+    # Arranque en caliente: muestra (y si es reciente, republica) lo último guardado
+    if not snapshot.warm_start():
+        return
+    events = snapshot.events()
+    ui_update_callback(f"📦 Último snapshot: {len(events)} eventos (hace {snapshot.age() / 60:.0f} min)")
+    for provider, items in snapshot.by_provider().items():
+        ui_update_callback(f"   {provider}: {len(items)} partidos")
+
+    if events and snapshot.age() <= SNAPSHOT_MAX_AGE:
+        ui_update_callback("↻ Snapshot reciente, se republica mientras llega la primera ejecución")
+        build_publisher(ui_update_callback).publish(events)
+
+
+def warm_up(ui_update_callback=print):
+    # Precalienta el índice de logos y las conexiones HTTP de cada proveedor
+    inicio = time.perf_counter()
+    load_logos()
+    for d in enabled_providers():
+        targets = d.warm_targets()
+        if targets:
+            net.warm_up(targets, verify=d.verify_tls)
+    ui_update_callback(f"✔ Precalentamiento listo ({time.perf_counter() - inicio:.1f}s)")
 
 
 # ===========================
 #     FUNCIÓN SCRAPING
 # ===========================
-def deep_clean(obj):
-    if isinstance(obj, dict):
-        return {str(k): deep_clean(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [deep_clean(i) for i in obj]
-    elif isinstance(obj, (int, float, str, bool)):
-        return obj
-    elif obj is None:
-        return ""
-    elif isinstance(obj, datetime.datetime):
-        return obj.isoformat()
-    return str(obj)
-
-def ejecutar_scraping(ui_update_callback, limpiar=True):
+def ejecutar_scraping(ui_update_callback, limpiar=True, snapshot=None):
     try:
         if limpiar:
             ui_update_callback("clear")
@@ -81,15 +119,19 @@ def ejecutar_scraping(ui_update_callback, limpiar=True):
         ui_update_callback("→ Obteniendo eventos")
         ui_update_callback("Esto puede tardar unos segundos")
 
-        service = ScraperService(provider_registry)
-        events = service.build_events()
-        raw_data = [asdict(e) for e in events]
-        data = deep_clean(raw_data)
+        service = ScraperService(provider_registry, log=ui_update_callback, prober=stream_prober)
+        token = CancelToken.with_timeout(RUN_DEADLINE_SECONDS)
+        events = service.build_events(token)
 
-        count = len(data)
+        count = len(events)
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-        ui_update_callback(f"✔ Scrapeo completado")
+        if token.unfinished:
+            ui_update_callback(f"⌛ Tiempo agotado ({RUN_DEADLINE_SECONDS}s), se publica lo obtenido")
+            for pendiente in token.unfinished:
+                ui_update_callback(f"   · {pendiente}")
+        else:
+            ui_update_callback(f"✔ Scrapeo completado")
         ui_update_callback(f"→ ({timestamp}) Eventos obtenidos: {count}")
 
         from collections import defaultdict
@@ -99,16 +141,23 @@ def ejecutar_scraping(ui_update_callback, limpiar=True):
 
         for provider, items in by_provider.items():
             total_streams = sum(len(e.streams) for e in items)
-            ui_update_callback(f"🔸 {provider}: {len(items)} partidos, {total_streams} streams")
-
-        json.dumps(data)
-
-        ui_update_callback("⏳ Enviando datos a Firebase ...")
-        response = requests.put(FIREBASE_URL, json=data, headers={"Content-Type": "application/json"}, timeout=30)
-        if response.status_code in (200, 201):
-             ui_update_callback("✅ Datos enviados correctamente a Firebase.")
-        else:
-             ui_update_callback(f"❌ Error HTTP: {response.status_code}")
+            caidos = sum(1 for e in items for s in e.streams if s.health == HEALTH_DEAD)
+            ui_update_callback(f"🔸 {provider}: {len(items)} partidos, {total_streams} streams ({caidos} caídos)")
+
+        # Mantiene el snapshot del modo automático al día con la ejecución manual
+        if snapshot is not None:
+            guardados = snapshot.providers()
+            for p in provider_registry:
+                items = by_provider.get(p.name, [])
+                if not items and p.name in guardados:
+                    # Los proveedores devuelven [] ante errores: se conserva lo anterior
+                    ui_update_callback(f"⚠ {p.name}: sin resultados, se conserva el snapshot")
+                    continue
+                snapshot.merge(p.name, items, partial=bool(token.unfinished))
+            if events:
+                snapshot.persist()
+
+        build_publisher(ui_update_callback).publish(events)
 
     except Exception as e:
         ui_update_callback(f"❌ Error:\n{str(e)}\n")
@@ -121,9 +170,11 @@ class ScraperGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Ploostream Scraper")
-        self.root.geometry("620x520")
+        self.root.geometry("620x660")
         self.root.configure(bg="#0d1b2a")
         self.auto_mode = tk.BooleanVar(value=False)
+        self.snapshot = Snapshot(SnapshotStore())
+        self.scheduler = None
 
         tk.Label(root, text="Ploostream Scraper", font=("Segoe UI", 16, "bold"), fg="white", bg="#0d1b2a").pack(pady=10)
 
@@ -149,18 +200,102 @@ class ScraperGUI:
                                                  bg="#1b263b", fg="white", insertbackground="white")
         self.log_box.pack(padx=20, pady=10)
 
+        # Una barra por proveedor con la etapa en curso y su ETA
+        progress_frame = tk.Frame(root, bg="#0d1b2a")
+        progress_frame.pack(fill="x", padx=20)
+        self.progress_rows = {}
+        for p in provider_registry:
+            row = tk.Frame(progress_frame, bg="#0d1b2a")
+            row.pack(fill="x", pady=1)
+            tk.Label(row, text=p.name, width=12, anchor="w", font=("Segoe UI", 9),
+                     fg="white", bg="#0d1b2a").pack(side="left")
+            bar = ttk.Progressbar(row, length=200, mode="determinate", maximum=100)
+            bar.pack(side="left", padx=(0, 8))
+            detail = tk.Label(row, text="en espera", anchor="w", font=("Segoe UI", 9),
+                              fg="#adb5bd", bg="#0d1b2a")
+            detail.pack(side="left", fill="x")
+            self.progress_rows[p.name] = (bar, detail)
+
+        self.breaker_label = tk.Label(root, text="", font=("Segoe UI", 9), fg="#f4a261", bg="#0d1b2a", anchor="w")
+        self.breaker_label.pack(fill="x", padx=20)
+
+        # Los hilos de trabajo solo encolan; Tk vuelca la cola por lotes
+        self.log_queue = queue.SimpleQueue()
+        self.flush_log()
+
+        breakers.subscribe(self.on_breaker_change)
+        self.refresh_breakers()
+
+        # El bus avisa desde los hilos de trabajo; Tk solo repinta si hubo cambios
+        self.progress_dirty = threading.Event()
+        progress.subscribe(lambda _: self.progress_dirty.set())
+        self.refresh_progress()
+
     def log(self, text):
-        if text == "clear":
-            self.log_box.delete("1.0", tk.END)
-        else:
-            self.log_box.insert(tk.END, text + "\n")
+        # Seguro desde cualquier hilo
+        self.log_queue.put(text)
+
+    def flush_log(self):
+        lines = []
+        while True:
+            try:
+                text = self.log_queue.get_nowait()
+            except queue.Empty:
+                break
+            if text == "clear":
+                lines.clear()
+                self.log_box.delete("1.0", tk.END)
+            else:
+                lines.append(text)
+
+        if lines:
+            self.log_box.insert(tk.END, "\n".join(lines) + "\n")
+            # Solo se conservan las últimas LOG_MAX_LINES líneas
+            total = int(self.log_box.index("end-1c").split(".")[0]) - 1
+            if total > LOG_MAX_LINES:
+                self.log_box.delete("1.0", f"{total - LOG_MAX_LINES + 1}.0")
             self.log_box.see(tk.END)
 
+        self.root.after(LOG_FLUSH_MS, self.flush_log)
+
+    def on_breaker_change(self, breaker, previous):
+        origen = f"{breaker.provider} · {breaker.host}"
+        if breaker.state == OPEN:
+            self.log(f"⛔ {origen}: circuito abierto tras {breaker.failures} fallos")
+        elif breaker.state == CLOSED:
+            self.log(f"🟢 {origen}: recuperado")
+        else:
+            self.log(f"🟡 {origen}: probando de nuevo")
+
+    def refresh_breakers(self):
+        abiertos = breakers.open_breakers()
+        if abiertos:
+            detalle = ", ".join(f"{b.host} ({b.retry_in():.0f}s)" for b in abiertos)
+            self.breaker_label.config(text=f"⛔ Circuitos abiertos: {detalle}")
+        else:
+            self.breaker_label.config(text="")
+        self.root.after(2000, self.refresh_breakers)
+
+    def refresh_progress(self):
+        if self.progress_dirty.is_set():
+            self.progress_dirty.clear()
+            for name, (bar, detail) in self.progress_rows.items():
+                stage = progress.current(name)
+                if stage is None:
+                    continue
+                fraction = stage.fraction
+                bar["value"] = 0 if fraction is None else fraction * 100
+                if stage.stage == RUN and stage.finished:
+                    detail.config(text=f"✔ listo en {stage.updated - stage.started:.0f}s")
+                else:
+                    detail.config(text=stage.describe())
+        self.root.after(PROGRESS_REFRESH_MS, self.refresh_progress)
+
     def clear_log(self):
-        self.log_box.delete("1.0", tk.END)
+        self.log("clear")
 
     def run_scraping_thread(self):
-        threading.Thread(target=ejecutar_scraping, args=(self.log,), daemon=True).start()
+        threading.Thread(target=ejecutar_scraping, args=(self.log, True, self.snapshot), daemon=True).start()
 
     def toggle_auto_scraping(self):
         try:
@@ -175,22 +310,42 @@ class ScraperGUI:
             return
 
         if self.auto_mode.get():
-            self.log(f"🔄 Modo automático activado (cada {interval} segundos)")
-            threading.Thread(target=self.auto_scrape_loop, args=(interval,), daemon=True).start()
+            # Cada proveedor tiene su propio intervalo; el valor ingresado es el máximo
+            self.log(f"🔄 Modo automático activado (cada proveedor a su ritmo, máximo {interval} segundos)")
+            publisher = build_publisher(self.log)
+            self.scheduler = RefreshScheduler(
+                ScraperService(provider_registry, log=self.log, prober=stream_prober),
+                self.snapshot,
+                on_publish=lambda events, diff: publisher.publish(events, wait=False),
+                max_interval=interval,
+                log=self.log,
+            )
+            self.scheduler.start()
         else:
+            if self.scheduler:
+                self.scheduler.stop()
+                self.scheduler = None
             self.log("🛑 Modo automático desactivado")
 
-    def auto_scrape_loop(self, interval):
-        while self.auto_mode.get():
-            ejecutar_scraping(self.log)
-            for _ in range(interval):
-                if not self.auto_mode.get():
-                    return
-                time.sleep(1)
+    def start_background_tasks(self):
+        threading.Thread(target=cargar_snapshot, args=(self.snapshot, self.log), daemon=True).start()
+        threading.Thread(target=check_for_updates, args=(self.log, self.schedule_update), daemon=True).start()
+        threading.Thread(target=warm_up, args=(self.log,), daemon=True).start()
+
+    def schedule_update(self, updater):
+        # El cierre debe ocurrir en el hilo de Tk
+        self.root.after(0, self.apply_update, updater)
+
+    def apply_update(self, updater):
+        os.startfile(updater)
+        self.root.destroy()
+        sys.exit()
 
 
 if __name__ == "__main__":
-    check_for_updates()
+    # Necesario para el pool de parseo en el ejecutable de PyInstaller (Windows)
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = ScraperGUI(root)
+    root.after_idle(app.start_background_tasks)
     root.mainloop()
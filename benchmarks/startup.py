@@ -0,0 +1,64 @@
+"""Mide el tiempo de import en el arranque.
+
+Cada medición corre en un intérprete nuevo para que la caché de módulos
+no falsee los resultados. Uso:
+
+    python benchmarks/startup.py [repeticiones]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPET = """
+import time
+t = time.perf_counter()
+{code}
+print(time.perf_counter() - t)
+"""
+
+CASES = [
+    ("registry (lazy)", "import scrapers.registry"),
+    ("registry + service", "import scrapers.registry, scrapers.service"),
+    ("proveedores (eager)", "\n".join([
+        "import scrapers.providers.kakarotfoot",
+        "import scrapers.providers.tiroalpalo",
+        "import scrapers.providers.kevinsport",
+        "import scrapers.providers.livetv",
+        "from scrapers.providers.utils.logos import load_logos",
+        "load_logos()",
+    ])),
+    ("app (GUI)", "import app"),
+]
+
+
+def measure(code: str, runs: int) -> list:
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", SNIPPET.format(code=code)],
+            cwd=ROOT, capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            raise RuntimeError(out.stderr.strip().splitlines()[-1])
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{'caso':<24}{'mediana':>12}{'mín':>12}")
+    for label, code in CASES:
+        try:
+            samples = measure(code, runs)
+        except RuntimeError as e:
+            print(f"{label:<24}{'error':>12}  {e}")
+            continue
+        print(f"{label:<24}{statistics.median(samples) * 1000:>10.1f}ms"
+              f"{min(samples) * 1000:>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import argparse
+import datetime
+import threading
+from collections import defaultdict
+
+from . import aio
+from .cancel import CancelToken
+from .probe import HEALTH_DEAD, stream_prober
+from .progress import StageProgress, progress
+from .tracing import tracer
+from .publish import build_publisher
+from .registry import provider_registry
+from .scheduler import RefreshScheduler
+from .server import ChangeFeed, start_server
+from .service import ScraperService
+from .snapshot import SNAPSHOT_MAX_AGE, Snapshot, SnapshotStore
+
+
+def log(text: str):
+    print(f"[{datetime.datetime.now():%H:%M:%S}] {text}", flush=True)
+
+
+def progress_logger():
+    # Una línea al empezar cada etapa, en cada cuarto del total y al terminar
+    reported = {}
+    lock = threading.Lock()
+
+    def on_progress(p: StageProgress):
+        step = 5 if p.finished else int((p.fraction or 0) * 4)
+        mark = (p.started, step)
+        with lock:
+            if reported.get((p.provider, p.stage)) == mark:
+                return
+            reported[(p.provider, p.stage)] = mark
+        log(f"  {p.provider} · {p.describe()}")
+
+    return on_progress
+
+
+def cmd_run(args):
+    service = ScraperService(provider_registry, log=log, prober=stream_prober, prune_dead=args.prune_dead)
+    token = CancelToken.with_timeout(args.deadline)
+    on_progress = progress_logger()
+    progress.subscribe(on_progress)
+    try:
+        events = service.build_events(token)
+    finally:
+        progress.unsubscribe(on_progress)
+
+    by_provider = defaultdict(list)
+    for ev in events:
+        by_provider[ev.provider].append(ev)
+    log(f"Eventos obtenidos: {len(events)}")
+    for provider, items in by_provider.items():
+        caidos = sum(1 for e in items for s in e.streams if s.health == HEALTH_DEAD)
+        log(f"  {provider}: {len(items)} partidos, {sum(len(e.streams) for e in items)} streams ({caidos} caídos)")
+    for pendiente in token.unfinished:
+        log(f"  sin terminar: {pendiente}")
+
+    publisher = build_publisher(log, firebase=args.firebase, output=args.output)
+    if publisher.sinks and events:
+        publisher.publish(events)
+    aio.close_sessions()
+
+
+def cmd_serve(args):
+    feed = ChangeFeed()
+    snapshot = Snapshot(SnapshotStore())
+    publisher = build_publisher(log, firebase=args.firebase, output=args.output, feed=feed)
+
+    if snapshot.warm_start():
+        feed.update(snapshot.events())
+        log(f"Snapshot cargado: {len(feed.events())} eventos (hace {snapshot.age() / 60:.0f} min)")
+        if snapshot.age() <= SNAPSHOT_MAX_AGE:
+            publisher.publish(snapshot.events())
+
+    def on_publish(events, diff):
+        # Sin esperar: un Firebase lento no retiene la siguiente fusión del planificador
+        publisher.publish(events, wait=False)
+
+    scheduler = RefreshScheduler(
+        ScraperService(provider_registry, log=log, prober=stream_prober, prune_dead=args.prune_dead),
+        snapshot,
+        on_publish=on_publish,
+        log=log,
+    )
+
+    start_server(feed, args.host, args.port)
+    log(f"Servidor en http://{args.host}:{args.port} (/events, /events/stream, /progress, /metrics)")
+    scheduler.start()
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m scrapers", description="Ploostream Scraper sin interfaz")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="una ejecución completa e imprime el resumen")
+    run.add_argument("--deadline", type=float, default=600, help="tiempo máximo en segundos")
+    run.add_argument("--firebase", action="store_true", help="publicar el resultado en Firebase")
+    run.add_argument("--output", metavar="FICHERO", help="guardar el resultado en un fichero .json o .ndjson")
+    run.add_argument("--prune-dead", action="store_true", help="descartar streams que no responden")
+    run.add_argument("--trace", nargs="?", const="", metavar="FICHERO",
+                     help="guardar una traza por spans (chrome://tracing, Perfetto)")
+    run.set_defaults(func=cmd_run)
+
+    serve = sub.add_parser("serve", help="modo servidor: refresco continuo y feed de cambios")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--firebase", action="store_true", help="publicar también en Firebase")
+    serve.add_argument("--output", metavar="FICHERO", help="copia local de cada publicación (.json o .ndjson)")
+    serve.add_argument("--prune-dead", action="store_true", help="descartar streams que no responden")
+    serve.add_argument("--trace", nargs="?", const="", metavar="FICHERO",
+                       help="guardar una traza por spans (chrome://tracing, Perfetto)")
+    serve.set_defaults(func=cmd_serve)
+
+    args = parser.parse_args()
+    if args.trace is not None:
+        log(f"Traza en {tracer.start(args.trace or None)}")
+    try:
+        args.func(args)
+    finally:
+        tracer.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Coroutine, Dict, Optional
+
+# Un único event loop de larga vida en un hilo propio. Los servicios
+# asíncronos (navegador, sesiones) viven aquí y los hilos síncronos les
+# envían trabajo con submit()/run().
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+_sessions: Dict[str, Any] = {}
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _thread
+    if _loop is None:
+        with _lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="scrapers-aio", daemon=True)
+                thread.start()
+                _thread = thread
+                _loop = loop
+    return _loop
+
+
+def in_loop_thread() -> bool:
+    return _thread is not None and threading.current_thread() is _thread
+
+
+def submit(coro: Coroutine) -> concurrent.futures.Future:
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+
+def run(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    if in_loop_thread():
+        coro.close()
+        raise RuntimeError("aio.run() no puede llamarse desde el propio event loop")
+    future = submit(coro)
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+
+
+async def client_session(name: str = "default", **kwargs):
+    # Sesiones aiohttp compartidas entre proveedores y ejecuciones, una por
+    # nombre. Solo se tocan desde el loop, así que no necesitan lock.
+    import aiohttp
+    from .dns import aiohttp_resolver
+    from .tracing import aiohttp_trace_config, tracer
+
+    session = _sessions.get(name)
+    if session is None or session.closed:
+        limit = kwargs.pop("limit", 100)
+        ssl = kwargs.pop("ssl", True)
+        kwargs.setdefault("connector", aiohttp.TCPConnector(
+            limit=limit, ssl=ssl, resolver=aiohttp_resolver(), use_dns_cache=False))
+        if tracer.enabled:
+            kwargs.setdefault("trace_configs", [aiohttp_trace_config()])
+        session = _sessions[name] = aiohttp.ClientSession(**kwargs)
+    return session
+
+
+async def _close_sessions():
+    sessions = list(_sessions.values())
+    _sessions.clear()
+    for session in sessions:
+        if not session.closed:
+            await session.close()
+
+
+def close_sessions():
+    if _loop is not None and _sessions:
+        run(_close_sessions())
@@ -1,9 +1,20 @@
 from abc import ABC, abstractmethod
+from functools import cached_property
 from typing import List
+from .config import ProviderSettings, provider_settings
 from .models import Event
 
 class BaseProvider(ABC):
     name: str
+    # Los proveedores asíncronos definen `async def fetch_events` y ponen
+    # is_async = True: ScraperService los ejecuta en el event loop compartido
+    is_async: bool = False
+    # Valores por defecto del proveedor; el entorno / .env los sobrescribe
+    defaults: ProviderSettings = ProviderSettings()
+
+    @cached_property
+    def settings(self) -> ProviderSettings:
+        return provider_settings(self.name, self.defaults)
 
     @abstractmethod
     def fetch_events(self) -> List[Event]:
@@ -0,0 +1,156 @@
+from __future__ import annotations
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .metrics import BREAKER_OPEN
+
+CLOSED = "cerrado"
+OPEN = "abierto"
+HALF_OPEN = "semiabierto"
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+# Tras failure_threshold fallos seguidos el circuito se abre y las peticiones
+# se rechazan al instante. Pasado reset_timeout deja pasar una sola petición
+# de prueba: si sale bien se cierra, si falla vuelve a abrirse.
+class CircuitBreaker:
+    def __init__(self, key: Tuple[str, str], failure_threshold: int = 3, reset_timeout: float = 120.0,
+                 on_change: Optional[Callable[["CircuitBreaker", str], None]] = None):
+        self.key = key
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_change = on_change
+
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def provider(self) -> str:
+        return self.key[0]
+
+    @property
+    def host(self) -> str:
+        return self.key[1]
+
+    def retry_in(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self.state != CLOSED:
+                self._set_state(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def release_probe(self):
+        # La petición de prueba terminó sin veredicto (fecha límite, cancelación):
+        # vuelve a abierto sin contar un fallo y la siguiente puede probar de nuevo
+        with self._lock:
+            if not self._probing:
+                return
+            self._probing = False
+            if self.state == HALF_OPEN:
+                self._set_state(OPEN)
+
+    def _set_state(self, state: str):
+        previous, self.state = self.state, state
+        if self.on_change and previous != state:
+            try:
+                self.on_change(self, previous)
+            except Exception:
+                pass
+
+    def to_dict(self) -> dict:
+        return {
+            "provider": self.provider,
+            "host": self.host,
+            "state": self.state,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "retry_in": round(self.retry_in(), 1),
+        }
+
+
+class BreakerRegistry:
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 120.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+        self._listeners: List[Callable[[CircuitBreaker, str], None]] = []
+        self._lock = threading.Lock()
+
+    def get(self, provider: str, url_or_host: str) -> CircuitBreaker:
+        host = url_or_host
+        if "://" in url_or_host:
+            host = urlparse(url_or_host).hostname or url_or_host
+        key = (provider, host.lower())
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = self._breakers[key] = CircuitBreaker(
+                    key, self.failure_threshold, self.reset_timeout, self._notify)
+            return breaker
+
+    def subscribe(self, listener: Callable[[CircuitBreaker, str], None]):
+        with self._lock:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[CircuitBreaker, str], None]):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            return [b.to_dict() for b in self._breakers.values()]
+
+    def open_breakers(self) -> List[CircuitBreaker]:
+        with self._lock:
+            return [b for b in self._breakers.values() if b.state != CLOSED]
+
+    def _notify(self, breaker: CircuitBreaker, previous: str):
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(breaker, previous)
+
+
+breakers = BreakerRegistry()
+
+
+def _open_breakers_metric() -> Dict[Tuple[str, str], float]:
+    return {b.key: 1.0 if b.state == OPEN else 0.5 for b in breakers.open_breakers()}
+
+
+BREAKER_OPEN.source(_open_breakers_metric)
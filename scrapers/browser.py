@@ -0,0 +1,205 @@
+from __future__ import annotations
+import asyncio
+import concurrent.futures
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+from urllib.parse import urljoin
+
+from . import aio
+from .breaker import breakers
+from .cancel import current_token
+from .context import current_provider
+from .metrics import PLAYWRIGHT_ACTIVE, PLAYWRIGHT_JOBS, PLAYWRIGHT_PAGES, PLAYWRIGHT_SECONDS
+from .progress import PLAYWRIGHT, progress
+from .tracing import span
+
+# Solo hacen falta el documento, los scripts y los iframes; el resto se bloquea.
+# "other" no se bloquea: incluye peticiones que los reproductores pueden necesitar.
+BLOCKED_RESOURCES = {"image", "font", "media", "stylesheet", "texttrack", "eventsource", "manifest"}
+BLOCKED_HOSTS = (
+    "googletagmanager.com", "google-analytics.com", "doubleclick.net",
+    "googlesyndication.com", "adservice.google", "facebook.net",
+    "yandex.ru/metrika", "mc.yandex", "histats.com", "popads", "propellerads",
+)
+
+NAVIGATION_TIMEOUT_MS = 15000
+SELECTOR_TIMEOUT_MS = 3000
+IDLE_TIMEOUT_MS = 1500
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:128.0) Gecko/20100101 Firefox/128.0"
+
+
+@dataclass
+class RenderResult:
+    url: str
+    iframes: List[str] = field(default_factory=list)
+    html: str = ""
+
+
+async def _route_filter(route):
+    request = route.request
+    url = request.url.lower()
+    if request.resource_type in BLOCKED_RESOURCES or any(h in url for h in BLOCKED_HOSTS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+# Un solo Chromium headless en el event loop compartido; cada trabajo abre
+# una página en el mismo contexto. max_pages limita las páginas simultáneas
+# y cada trabajo tiene su propio tiempo límite.
+class BrowserResolver:
+    def __init__(self, max_pages: int = 4, job_timeout: float = 20.0,
+                 idle_timeout: float = 120.0, user_agent: str = DEFAULT_USER_AGENT):
+        self.max_pages = max_pages
+        self.job_timeout = job_timeout
+        self.idle_timeout = idle_timeout
+        self.user_agent = user_agent
+
+        self._semaphore = asyncio.Semaphore(max_pages)
+        self._launch_lock = asyncio.Lock()
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._active = 0
+        self._idle_handle: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def active_jobs(self) -> int:
+        return self._active
+
+    # ------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------
+    def render(self, url: str, wait_selector: Optional[str] = None,
+               timeout: Optional[float] = None) -> Optional[RenderResult]:
+        token = current_token()
+        if token.cancelled:
+            return None
+        timeout = token.timeout(timeout or self.job_timeout)
+
+        # Circuito propio: un fallo de Chromium no debe bloquear las peticiones HTTP al host
+        breaker = breakers.get(f"{current_provider()}/playwright", url)
+        if not breaker.allow():
+            return None
+        # Trabajos encolados / terminados, visibles en el progreso del proveedor
+        progress.grow(PLAYWRIGHT)
+        inicio = time.monotonic()
+        result = None
+        try:
+            # Margen extra: el límite real lo aplica render_async dentro del loop
+            result = aio.run(self.render_async(url, wait_selector, timeout), timeout=timeout + 5)
+        except concurrent.futures.TimeoutError:
+            print(f"[Browser] Tiempo agotado esperando {url}")
+        finally:
+            progress.advance(PLAYWRIGHT)
+            PLAYWRIGHT_SECONDS.observe(time.monotonic() - inicio)
+            PLAYWRIGHT_JOBS.inc(result="ok" if result is not None else "error")
+            if result is not None:
+                breaker.record_success()
+            elif not token.cancelled:
+                breaker.record_failure()
+            else:
+                breaker.release_probe()
+        return result
+
+    async def render_async(self, url: str, wait_selector: Optional[str] = None,
+                           timeout: Optional[float] = None) -> Optional[RenderResult]:
+        timeout = timeout or self.job_timeout
+        self._cancel_idle()
+        self._active += 1
+        try:
+            with span("playwright", "browser", url=url):
+                return await asyncio.wait_for(self._render(url, wait_selector), timeout)
+        except asyncio.TimeoutError:
+            print(f"[Browser] Tiempo agotado renderizando {url}")
+            return None
+        except Exception as e:
+            print(f"[Browser] Error renderizando {url}: {e}")
+            return None
+        finally:
+            self._active -= 1
+            if self._active == 0:
+                self._schedule_idle()
+
+    def close(self):
+        if self._browser is not None:
+            aio.run(self._shutdown())
+
+    # ------------------------------------------------------------
+    # Interno (siempre en el event loop compartido)
+    # ------------------------------------------------------------
+    async def _render(self, url: str, wait_selector: Optional[str]) -> RenderResult:
+        async with self._semaphore, span("render", "browser", url=url):
+            context = await self._ensure_context()
+            page = await context.new_page()
+            try:
+                await page.goto(url, wait_until="domcontentloaded", timeout=NAVIGATION_TIMEOUT_MS)
+                await self._settle(page, wait_selector)
+
+                iframes = []
+                for fr in await page.query_selector_all("iframe"):
+                    src = await fr.get_attribute("src")
+                    if src:
+                        iframes.append(urljoin(url, src))
+                return RenderResult(url=url, iframes=iframes, html=await page.content())
+            finally:
+                await page.close()
+
+    async def _settle(self, page, wait_selector: Optional[str]):
+        # El selector esperado o, si no aparece, la red en reposo, con topes cortos
+        if wait_selector:
+            try:
+                await page.wait_for_selector(wait_selector, state="attached", timeout=SELECTOR_TIMEOUT_MS)
+                return
+            except Exception:
+                pass
+        try:
+            await page.wait_for_load_state("networkidle", timeout=IDLE_TIMEOUT_MS)
+        except Exception:
+            pass
+
+    async def _ensure_context(self):
+        async with self._launch_lock:
+            if self._context is None:
+                from playwright.async_api import async_playwright
+
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=True)
+                self._context = await self._browser.new_context(user_agent=self.user_agent)
+                await self._context.route("**/*", _route_filter)
+        return self._context
+
+    async def _shutdown(self, idle: bool = False):
+        async with self._launch_lock:
+            # El temporizador de inactividad ya disparado no se puede cancelar:
+            # si entretanto empezó un trabajo, Chromium sigue abierto
+            if idle and self._active > 0:
+                return
+            context, browser, playwright = self._context, self._browser, self._playwright
+            self._context = self._browser = self._playwright = None
+            for closer in (context and context.close, browser and browser.close, playwright and playwright.stop):
+                if closer is None:
+                    continue
+                try:
+                    await closer()
+                except Exception as e:
+                    print(f"[Browser] Error cerrando: {e}")
+
+    def _schedule_idle(self):
+        # Libera Chromium tras un rato sin trabajos
+        if self.idle_timeout and self._browser is not None:
+            loop = asyncio.get_running_loop()
+            self._idle_handle = loop.call_later(
+                self.idle_timeout, lambda: asyncio.ensure_future(self._shutdown(idle=True)))
+
+    def _cancel_idle(self):
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+            self._idle_handle = None
+
+
+browser_resolver = BrowserResolver()
+PLAYWRIGHT_ACTIVE.source(lambda: {(): browser_resolver.active_jobs})
+PLAYWRIGHT_PAGES.source(lambda: {(): browser_resolver.max_pages})
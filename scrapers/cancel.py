@@ -0,0 +1,97 @@
+from __future__ import annotations
+import contextlib
+import contextvars
+import threading
+import time
+from typing import Iterator, List, Optional
+
+
+class Cancelled(Exception):
+    pass
+
+
+# Token de cancelación cooperativa con fecha límite opcional. Proveedores,
+# llamadas HTTP y trabajos de Playwright lo consultan para recortar sus
+# tiempos de espera y dejar de trabajar cuando se acaba el presupuesto.
+class CancelToken:
+    def __init__(self, deadline: Optional[float] = None):
+        self.deadline = deadline  # time.monotonic()
+        self.reason = ""
+        self._cancelled = threading.Event()
+        self._unfinished: List[str] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def with_timeout(cls, seconds: Optional[float]) -> "CancelToken":
+        return cls(time.monotonic() + seconds if seconds else None)
+
+    def cancel(self, reason: str = "cancelado"):
+        if not self._cancelled.is_set():
+            self.reason = reason
+            self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._cancelled.is_set() and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("tiempo agotado")
+        return self._cancelled.is_set()
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def timeout(self, default: Optional[float]) -> Optional[float]:
+        # El menor entre el timeout propio de la llamada y lo que queda de la ejecución
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        if default is None:
+            return remaining
+        return min(default, remaining)
+
+    def sleep(self, seconds: float) -> bool:
+        # Espera interrumpible; False si la ejecución se cancela entretanto
+        timeout = self.timeout(seconds)
+        if timeout:
+            self._cancelled.wait(timeout)
+        return not self.cancelled
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise Cancelled(self.reason)
+
+    def note_unfinished(self, what: str):
+        with self._lock:
+            self._unfinished.append(what)
+
+    @property
+    def unfinished(self) -> List[str]:
+        with self._lock:
+            return list(self._unfinished)
+
+    @contextlib.contextmanager
+    def activate(self) -> Iterator["CancelToken"]:
+        reset = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(reset)
+
+
+class _NeverToken(CancelToken):
+    # Token por defecto fuera de una ejecución: nunca se cancela ni acumula
+    def cancel(self, reason: str = "cancelado"):
+        pass
+
+    def note_unfinished(self, what: str):
+        pass
+
+
+NEVER = _NeverToken()
+
+_current: contextvars.ContextVar[CancelToken] = contextvars.ContextVar("cancel_token", default=NEVER)
+
+
+def current_token() -> CancelToken:
+    return _current.get()
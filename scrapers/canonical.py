@@ -0,0 +1,96 @@
+from __future__ import annotations
+import hashlib
+from typing import Callable, Dict, Hashable, List, Optional
+from urllib.parse import unquote_plus, urljoin, urlsplit, urlunsplit
+
+from .models import Event, Stream
+
+TRACKING_PARAMS = {"fbclid", "gclid", "yclid", "dclid", "msclkid", "mc_cid", "mc_eid", "_ga", "ref", "ref_src", "igshid"}
+TRACKING_PREFIXES = ("utm_",)
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _is_tracking(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def clean_url(url: str, base: Optional[str] = None) -> str:
+    # URL publicable: absoluta, esquema y host en minúsculas, sin puerto por
+    # defecto, sin parámetros de seguimiento ni fragmento. El resto del query
+    # conserva su orden porque algunos reproductores dependen de él. Una URL
+    # mal formada (puerto no numérico, IPv6 sin cerrar) se devuelve tal cual.
+    url = url.strip()
+    try:
+        if url.startswith("//"):
+            url = "https:" + url
+        elif base and "://" not in url:
+            url = urljoin(base, url)
+
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or "").lower()
+        if not host:
+            return url
+        # hostname quita los corchetes de IPv6; hacen falta en el netloc
+        netloc = f"[{host}]" if ":" in host else host
+        if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+            netloc = f"{netloc}:{parts.port}"
+    except ValueError:
+        return url
+
+    # Se filtra el query sin decodificarlo para no alterar la codificación original
+    query = "&".join(p for p in parts.query.split("&") if p and not _is_tracking(unquote_plus(p.split("=", 1)[0])))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+def url_key(url: str) -> str:
+    # Identidad del stream: ignora http/https, la barra final y el orden del query
+    url = clean_url(url)
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        identity = url
+    else:
+        path = parts.path.rstrip("/") or "/"
+        query = "&".join(sorted(p for p in parts.query.split("&") if p))
+        identity = f"{parts.netloc}{path}?{query}"
+    return hashlib.blake2b(identity.encode("utf-8"), digest_size=12).hexdigest()
+
+
+# Índice por hash de URL canónica. Cada grupo (por defecto, cada evento) se
+# queda con la primera aparición de cada stream; group_key permite agrupar
+# varios eventos fusionados bajo una misma clave.
+class StreamIndex:
+    def __init__(self):
+        self._seen: Dict[Hashable, set] = {}
+        self.removed = 0
+
+    def add(self, group: Hashable, stream: Stream) -> bool:
+        key = url_key(stream.url)
+        seen = self._seen.setdefault(group, set())
+        if key in seen:
+            self.removed += 1
+            return False
+        seen.add(key)
+        return True
+
+    def dedupe(self, events: List[Event],
+               group_key: Optional[Callable[[Event], Hashable]] = None) -> List[Event]:
+        for e in events:
+            group = group_key(e) if group_key else id(e)
+            unique = []
+            for s in e.streams:
+                s.url = clean_url(s.url, e.url)
+                if self.add(group, s):
+                    unique.append(s)
+            e.streams = unique
+        return events
+
+
+def canonicalize_events(events: List[Event],
+                        group_key: Optional[Callable[[Event], Hashable]] = None) -> int:
+    # Limpia las URLs y elimina streams repetidos; devuelve cuántos se quitaron
+    index = StreamIndex()
+    index.dedupe(events, group_key)
+    return index.removed
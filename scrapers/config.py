@@ -0,0 +1,109 @@
+from __future__ import annotations
+import dataclasses
+import os
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+# Configuración por despliegue. Se lee de variables de entorno y, si existe,
+# de un fichero .env junto al ejecutable (o en el directorio actual). Las
+# variables del entorno tienen prioridad sobre el .env.
+#
+#   PLOOSTREAM_<PROVEEDOR>_ENABLED=0         desactiva un proveedor
+#   PLOOSTREAM_LIVETV_CONCURRENCY=4          peticiones en paralelo
+#   PLOOSTREAM_TIROALPALO_TIMEOUT=30         segundos por petición
+#   PLOOSTREAM_KAKAROTFOOT_URL=...           URL de la lista / feed
+#   PLOOSTREAM_KEVINSPORT_USER_AGENT=...
+#   PLOOSTREAM_LIVETV_PLAYWRIGHT=0           sin navegador
+#   PLOOSTREAM_PROBE_OK_TTL=600              TTL de cachés compartidas
+#
+# El nombre del proveedor va en mayúsculas y sin espacios.
+
+PREFIX = "PLOOSTREAM_"
+_TRUE = {"1", "true", "yes", "si", "sí", "on"}
+_FALSE = {"0", "false", "no", "off"}
+
+_loaded = False
+
+
+def _env_dirs():
+    if getattr(sys, "frozen", False):
+        yield os.path.dirname(sys.executable)
+    yield os.getcwd()
+
+
+def load_env():
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    for folder in _env_dirs():
+        path = os.path.join(folder, ".env")
+        if os.path.isfile(path):
+            load_dotenv(path, override=False)
+
+
+def _convert(key: str, raw: str, default: Any) -> Any:
+    raw = raw.strip()
+    try:
+        if isinstance(default, bool):
+            if raw.lower() in _TRUE:
+                return True
+            if raw.lower() in _FALSE:
+                return False
+            raise ValueError(raw)
+        if isinstance(default, int):
+            return int(raw)
+        if isinstance(default, float):
+            return float(raw)
+    except ValueError:
+        print(f"[Config] Valor no válido para {key}: {raw!r}, se usa {default!r}")
+        return default
+    return raw
+
+
+def setting(name: str, default: Any) -> Any:
+    # Valor global PLOOSTREAM_<NAME>, con el tipo del valor por defecto
+    load_env()
+    key = PREFIX + name
+    raw = os.environ.get(key)
+    if raw is None or raw.strip() == "":
+        return default
+    return _convert(key, raw, default)
+
+
+@dataclass(frozen=True)
+class ProviderSettings:
+    enabled: bool = True
+    url: str = ""
+    timeout: float = 15.0
+    concurrency: int = 10
+    user_agent: str = "Mozilla/5.0"
+    playwright: bool = False
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"User-Agent": self.user_agent}
+
+
+def env_key(provider: str) -> str:
+    return "".join(c for c in provider.upper() if c.isalnum())
+
+
+def provider_settings(provider: str, defaults: Optional[ProviderSettings] = None) -> ProviderSettings:
+    defaults = defaults or ProviderSettings()
+    base = env_key(provider)
+    overrides = {}
+    for field in dataclasses.fields(ProviderSettings):
+        default = getattr(defaults, field.name)
+        value = setting(f"{base}_{field.name.upper()}", default)
+        if value != default:
+            overrides[field.name] = value
+    return dataclasses.replace(defaults, **overrides) if overrides else defaults
+
+
+load_env()
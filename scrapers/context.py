@@ -0,0 +1,21 @@
+from __future__ import annotations
+import contextlib
+import contextvars
+from typing import Iterator
+
+# Proveedor que está ejecutando el código actual; lo usan la capa HTTP y el
+# navegador para etiquetar y separar su estado por proveedor.
+_provider: contextvars.ContextVar[str] = contextvars.ContextVar("provider", default="")
+
+
+def current_provider() -> str:
+    return _provider.get()
+
+
+@contextlib.contextmanager
+def provider_scope(name: str) -> Iterator[str]:
+    reset = _provider.set(name)
+    try:
+        yield name
+    finally:
+        _provider.reset(reset)
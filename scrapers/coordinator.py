@@ -0,0 +1,171 @@
+from __future__ import annotations
+import asyncio
+import concurrent.futures
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+from .cancel import Cancelled, current_token
+from .metrics import CACHE_HITS, CACHE_MISSES
+
+T = TypeVar("T")
+
+JOIN = "join"
+QUEUE = "queue"
+
+
+class _Flight:
+    def __init__(self):
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+        self.started = time.monotonic()
+
+
+# Garantiza una sola ejecución en curso por clave (proveedor). Una petición
+# que llega mientras otra corre se une a ella si es reciente, o se encola
+# detrás en una única ejecución siguiente compartida por todos los que esperan.
+class RunCoordinator:
+    def __init__(self, max_join_age: float = 30.0):
+        self.max_join_age = max_join_age
+        self._lock = threading.Lock()
+        self._current: Dict[str, _Flight] = {}
+        self._queued: Dict[str, _Flight] = {}
+
+    def in_flight(self, key: str) -> bool:
+        with self._lock:
+            return key in self._current
+
+    def run(self, key: str, fn: Callable[[], T],
+            on_coalesced: Optional[Callable[[str], None]] = None) -> T:
+        wait_for: Optional[_Flight] = None
+        with self._lock:
+            current = self._current.get(key)
+            if current is None:
+                flight = self._current[key] = _Flight()
+            elif time.monotonic() - current.started <= self.max_join_age:
+                flight = None
+                joined, kind = current, JOIN
+            elif key in self._queued:
+                flight = None
+                joined, kind = self._queued[key], QUEUE
+            else:
+                flight = self._queued[key] = _Flight()
+                wait_for = current
+
+        # Quien espera a otra ejecución no pasa de su propia fecha límite
+        token = current_token()
+
+        if flight is None:
+            if on_coalesced:
+                on_coalesced(kind)
+            try:
+                return joined.future.result(timeout=token.remaining())
+            except concurrent.futures.TimeoutError:
+                raise Cancelled("tiempo agotado esperando la ejecución en curso")
+
+        if wait_for is not None:
+            if on_coalesced:
+                on_coalesced(QUEUE)
+            done, _ = concurrent.futures.wait([wait_for.future], timeout=token.remaining())
+            if not done:
+                self._abandon(key, flight)
+                error = Cancelled("tiempo agotado en cola")
+                flight.future.set_exception(error)
+                raise error
+            flight.started = time.monotonic()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, flight)
+            flight.future.set_exception(e)
+            raise
+        self._finish(key, flight)
+        flight.future.set_result(result)
+        return result
+
+    def _finish(self, key: str, flight: _Flight):
+        # Se promueve la ejecución encolada antes de liberar a los que esperan,
+        # así nadie ve la clave libre y arranca un duplicado
+        with self._lock:
+            if self._current.get(key) is flight:
+                queued = self._queued.pop(key, None)
+                if queued is not None:
+                    self._current[key] = queued
+                else:
+                    del self._current[key]
+
+
+    def _abandon(self, key: str, flight: _Flight):
+        # La ejecución encolada no llegó a arrancar; puede que ya estuviera promovida
+        with self._lock:
+            if self._queued.get(key) is flight:
+                del self._queued[key]
+            if self._current.get(key) is flight:
+                del self._current[key]
+
+
+def _consume(task: asyncio.Future):
+    if not task.cancelled():
+        task.exception()
+
+
+# Mapa de una sola ejecución: peticiones simultáneas (o repetidas) de la misma
+# clave comparten una única descarga + parseo y su resultado. Se crea uno por
+# ejecución del proveedor, así que nada sobrevive de una ejecución a otra.
+class SingleFlight:
+    def __init__(self, cache: str = "flight"):
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._futures: Dict[Hashable, concurrent.futures.Future] = {}
+        self._tasks: Dict[Hashable, asyncio.Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            future = self._futures.get(key)
+            owner = future is None
+            if owner:
+                future = self._futures[key] = concurrent.futures.Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+        (CACHE_MISSES if owner else CACHE_HITS).inc(cache=self.cache)
+
+        if owner:
+            try:
+                future.set_result(fn())
+            except BaseException as e:
+                future.set_exception(e)
+            return future.result()
+
+        try:
+            return future.result(timeout=current_token().remaining())
+        except concurrent.futures.TimeoutError:
+            raise Cancelled("tiempo agotado esperando una descarga compartida")
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        # Solo desde el event loop: no hace falta lock
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(fn())
+            # Si todos los que esperan se cancelan, nadie lee el resultado:
+            # se recoge aquí para que asyncio no avise de una excepción perdida
+            task.add_done_callback(_consume)
+            self.misses += 1
+            CACHE_MISSES.inc(cache=self.cache)
+        else:
+            self.hits += 1
+            CACHE_HITS.inc(cache=self.cache)
+        # shield: cancelar a quien espera no cancela la descarga de los demás
+        return await asyncio.shield(task)
+
+    def cancel_pending(self) -> int:
+        pending = [t for t in self._tasks.values() if not t.done()]
+        for t in pending:
+            t.cancel()
+        return len(pending)
+
+
+# Las instancias de proveedores son globales, así que el coordinador también
+run_coordinator = RunCoordinator()
@@ -0,0 +1,179 @@
+from __future__ import annotations
+import asyncio
+import ipaddress
+import socket
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from . import aio
+from .config import setting
+from .metrics import CACHE_HITS, CACHE_MISSES
+from .tracing import span
+
+MIN_TTL = setting("DNS_MIN_TTL", 30)
+MAX_TTL = setting("DNS_MAX_TTL", 3600)
+NEGATIVE_TTL = setting("DNS_NEGATIVE_TTL", 30)
+QUERY_TIMEOUT = 5.0
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+def host_of(url_or_host: str) -> str:
+    if "://" in url_or_host or url_or_host.startswith("//"):
+        return (urlparse(url_or_host).hostname or "").lower()
+    return url_or_host.lower()
+
+
+# Caché DNS compartida. Las consultas se hacen con aiodns en el event loop
+# común y respetan el TTL de la respuesta (acotado entre MIN_TTL y MAX_TTL).
+# Varias consultas simultáneas al mismo host comparten una sola petición.
+class DNSCache:
+    def __init__(self, min_ttl: float = MIN_TTL, max_ttl: float = MAX_TTL,
+                 negative_ttl: float = NEGATIVE_TTL):
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: Dict[str, Tuple[List[str], float]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._resolver = None
+
+    # ------------------------------------------------------------
+    # API síncrona (cualquier hilo)
+    # ------------------------------------------------------------
+    def cached(self, host: str) -> Optional[List[str]]:
+        with self._lock:
+            entry = self._entries.get(host)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        return None
+
+    def resolve(self, host: str, timeout: float = QUERY_TIMEOUT) -> List[str]:
+        host = host_of(host)
+        if _is_ip(host):
+            return [host]
+        ips = self.cached(host)
+        if ips is not None:
+            self.hits += 1
+            return ips
+        if aio.in_loop_thread():
+            return []
+        try:
+            with span("dns", "net", host=host):
+                return aio.run(self.resolve_async(host), timeout=timeout + 1)
+        except Exception:
+            return []
+
+    def prefetch(self, urls_or_hosts: Iterable[str]):
+        # Lanza las consultas en segundo plano para los hosts aún no cacheados
+        for host in {host_of(u) for u in urls_or_hosts}:
+            if host and not _is_ip(host) and self.cached(host) is None:
+                aio.submit(self.resolve_async(host))
+
+    def invalidate(self, host: str):
+        with self._lock:
+            self._entries.pop(host_of(host), None)
+
+    # ------------------------------------------------------------
+    # API asíncrona
+    # ------------------------------------------------------------
+    async def resolve_any_loop(self, host: str) -> List[str]:
+        # aiodns está ligado al loop compartido; desde otro loop se delega en él
+        if aio.in_loop_thread():
+            return await self.resolve_async(host)
+        return await asyncio.wrap_future(aio.submit(self.resolve_async(host)))
+
+    async def resolve_async(self, host: str) -> List[str]:
+        host = host_of(host)
+        if _is_ip(host):
+            return [host]
+        ips = self.cached(host)
+        if ips is not None:
+            self.hits += 1
+            return ips
+
+        pending = self._inflight.get(host)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[host] = future
+        try:
+            try:
+                ips, ttl = await self._query(host)
+            except Exception:
+                ips, ttl = [], self.negative_ttl
+            with self._lock:
+                self._entries[host] = (ips, time.monotonic() + ttl)
+            future.set_result(ips)
+            return ips
+        finally:
+            self._inflight.pop(host, None)
+            if not future.done():
+                future.set_result([])
+
+    async def _query(self, host: str) -> Tuple[List[str], float]:
+        if self._resolver is None:
+            try:
+                import aiodns
+                self._resolver = aiodns.DNSResolver(loop=asyncio.get_running_loop())
+            except Exception:
+                self._resolver = False
+
+        if self._resolver is False:
+            # Sin aiodns: resolución del sistema, sin TTL conocido
+            infos = await asyncio.get_running_loop().getaddrinfo(host, None, family=socket.AF_INET,
+                                                                 type=socket.SOCK_STREAM)
+            ips = list(dict.fromkeys(info[4][0] for info in infos))
+            return ips, self.min_ttl
+
+        answers = await asyncio.wait_for(self._resolver.query(host, "A"), QUERY_TIMEOUT)
+        ips = [a.host for a in answers]
+        ttl = min((a.ttl for a in answers), default=self.min_ttl)
+        return ips, min(max(ttl, self.min_ttl), self.max_ttl)
+
+
+dns_cache = DNSCache()
+CACHE_HITS.source(lambda: {("dns",): dns_cache.hits})
+CACHE_MISSES.source(lambda: {("dns",): dns_cache.misses})
+
+
+# ------------------------------------------------------------
+# aiohttp: resolvedor que usa la caché compartida
+# ------------------------------------------------------------
+_resolver_cls = None
+
+
+def aiohttp_resolver():
+    global _resolver_cls
+    if _resolver_cls is None:
+        from aiohttp.abc import AbstractResolver
+        from aiohttp.resolver import ThreadedResolver
+
+        class CachedResolver(AbstractResolver):
+            async def resolve(self, host, port=0, family=socket.AF_INET):
+                ips = await dns_cache.resolve_any_loop(host)
+                if not ips:
+                    return await ThreadedResolver().resolve(host, port, family)
+                return [{
+                    "hostname": host, "host": ip, "port": port,
+                    "family": socket.AF_INET, "proto": 0, "flags": socket.AI_NUMERICHOST,
+                } for ip in ips]
+
+            async def close(self):
+                pass
+
+        _resolver_cls = CachedResolver
+    return _resolver_cls()
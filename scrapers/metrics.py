@@ -0,0 +1,200 @@
+from __future__ import annotations
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Métricas en formato de texto de Prometheus, sin dependencias. Cada módulo
+# actualiza sus contadores o registra una fuente que se lee al servir
+# /metrics (para estado que ya lleva otro objeto: cachés, breakers...).
+
+LabelValues = Tuple[str, ...]
+Source = Callable[[], Dict[LabelValues, float]]
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30)
+RUN_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1200)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[LabelValues, float] = {}
+        self._sources: List[Source] = []
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labels)
+
+    def source(self, fn: Source):
+        # Valores calculados al leer /metrics
+        self._sources.append(fn)
+
+    def samples(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            values = dict(self._values)
+        for fn in self._sources:
+            try:
+                for key, value in fn().items():
+                    values[key] = values.get(key, 0) + value
+            except Exception as e:
+                print(f"[Metrics] Error leyendo {self.name}: {e}")
+        return values
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(self.samples().items()):
+            lines.append(f"{self.name}{_labels(self.labels, key)} {_number(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def clear(self, **labels: str):
+        # Borra las series que coinciden con las etiquetas dadas
+        with self._lock:
+            for key in [k for k in self._values
+                        if all(k[self.labels.index(n)] == str(v) for n, v in labels.items())]:
+                del self._values[key]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # cuenta por bucket (+Inf al final), suma
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for key, values in sorted(series.items()):
+            acumulado = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values[:-1]):
+                acumulado += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, le)} {acumulado}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {values[-1]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {acumulado}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+# ============================================================
+# Métricas comunes
+# ============================================================
+RUNS = metrics.counter("ploostream_runs_total", "Ejecuciones de proveedores por resultado", ("provider", "result"))
+RUN_SECONDS = metrics.histogram("ploostream_run_duration_seconds", "Duración de cada ejecución de proveedor",
+                                ("provider",), RUN_BUCKETS)
+EVENTS = metrics.gauge("ploostream_events", "Eventos de la última ejecución", ("provider",))
+STREAMS = metrics.gauge("ploostream_streams", "Streams de la última ejecución por estado", ("provider", "health"))
+
+HTTP_REQUESTS = metrics.counter("ploostream_http_requests_total", "Peticiones HTTP por host y estado",
+                                ("host", "status"))
+HTTP_SECONDS = metrics.histogram("ploostream_http_request_duration_seconds", "Latencia HTTP por host", ("host",))
+HTTP_RETRY_TOTAL = metrics.counter("ploostream_http_retries_total", "Reintentos HTTP", ("host",))
+HTTP_HEDGES = metrics.counter("ploostream_http_hedges_total", "Peticiones duplicadas por latencia alta", ("host",))
+HTTP_CONNECTIONS = metrics.counter("ploostream_http_connections_total",
+                                   "Conexiones nuevas (el resto reutiliza keep-alive)", ("host",))
+
+CACHE_HITS = metrics.counter("ploostream_cache_hits_total", "Aciertos de caché", ("cache",))
+CACHE_MISSES = metrics.counter("ploostream_cache_misses_total", "Fallos de caché", ("cache",))
+LOGO_LOOKUPS = metrics.counter("ploostream_logo_lookups_total", "Búsquedas de logos por resultado", ("result",))
+
+PLAYWRIGHT_JOBS = metrics.counter("ploostream_playwright_jobs_total", "Trabajos de Playwright por resultado",
+                                  ("result",))
+PLAYWRIGHT_SECONDS = metrics.histogram("ploostream_playwright_job_duration_seconds",
+                                       "Duración de los trabajos de Playwright")
+PLAYWRIGHT_ACTIVE = metrics.gauge("ploostream_playwright_active_jobs", "Trabajos de Playwright en curso")
+PLAYWRIGHT_PAGES = metrics.gauge("ploostream_playwright_max_pages", "Páginas simultáneas permitidas")
+
+PUBLISH = metrics.counter("ploostream_publish_total", "Publicaciones por destino y resultado", ("sink", "result"))
+PUBLISH_BYTES = metrics.counter("ploostream_publish_bytes_total", "Bytes publicados por destino", ("sink",))
+PUBLISH_SECONDS = metrics.histogram("ploostream_publish_duration_seconds", "Duración de cada publicación", ("sink",))
+
+BREAKER_OPEN = metrics.gauge("ploostream_breaker_open", "Circuitos abiertos (1) o semiabiertos (0.5)",
+                             ("provider", "host"))
+
+
+def observe_http(host: str, status: str, seconds: Optional[float] = None):
+    HTTP_REQUESTS.inc(host=host, status=status)
+    if seconds is not None:
+        HTTP_SECONDS.observe(seconds, host=host)
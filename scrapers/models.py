@@ -1,4 +1,4 @@
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, fields, asdict
 from typing import List, Optional
 
 @dataclass
@@ -8,9 +8,18 @@ class Stream:
     language: Optional[str] = None
     source: Optional[str] = None
 
+    # Resultado del sondeo de disponibilidad (ver scrapers/probe.py)
+    health: Optional[str] = None
+    latency_ms: Optional[int] = None
+
     def to_dict(self):
         return asdict(self)
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "Stream":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
 @dataclass
 class Event:
     id: str
@@ -31,3 +40,10 @@ class Event:
 
     def to_dict(self):
         return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Event":
+        known = {f.name for f in fields(cls)}
+        values = {k: v for k, v in data.items() if k in known}
+        values["streams"] = [Stream.from_dict(s) for s in data.get("streams", [])]
+        return cls(**values)
@@ -0,0 +1,335 @@
+from __future__ import annotations
+import collections
+import concurrent.futures
+import random
+import threading
+import time
+from typing import Deque, Dict, Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util import connection
+
+from .breaker import CLOSED, CircuitOpen, breakers
+from .cancel import CancelToken, current_token
+from .config import setting
+from .context import current_provider
+from .dns import dns_cache, host_of
+from .metrics import HTTP_CONNECTIONS, HTTP_HEDGES, HTTP_RETRY_TOTAL, observe_http
+from .tracing import span, tracer
+
+# Sesión HTTP compartida: reutiliza conexiones keep-alive entre proveedores
+# y entre ejecuciones en lugar de abrir un socket nuevo por cada requests.get.
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 32
+
+# Reintentos de GET (idempotentes) con espera exponencial acotada y jitter
+HTTP_RETRIES = setting("HTTP_RETRIES", 2)
+BACKOFF_BASE = setting("HTTP_BACKOFF", 0.5)
+BACKOFF_MAX = setting("HTTP_BACKOFF_MAX", 8.0)
+RETRY_STATUSES = {429, 502, 503, 504}
+
+# Peticiones duplicadas (hedging): si la respuesta tarda más que el percentil
+# HEDGE_PERCENTILE de ese host se lanza una segunda y gana la primera que llegue
+HEDGE_ENABLED = setting("HTTP_HEDGE", True)
+HEDGE_PERCENTILE = setting("HTTP_HEDGE_PERCENTILE", 0.95)
+HEDGE_MIN_DELAY = 0.25
+HEDGE_BUDGET = 0.1          # como mucho un 10% de peticiones duplicadas por host
+HEDGE_MIN_SAMPLES = 10
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_hedge_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+
+# ------------------------------------------------------------
+# urllib3 con la caché DNS compartida
+# ------------------------------------------------------------
+class _CachedDNSMixin:
+    def _new_conn(self):
+        # El host original se conserva para SNI y Host; solo cambia la dirección
+        HTTP_CONNECTIONS.inc(host=self._dns_host)
+        ips = dns_cache.resolve(self._dns_host)
+        if not ips:
+            with span("connect", "net", host=self._dns_host):
+                return super()._new_conn()
+
+        error: Optional[OSError] = None
+        for ip in ips:
+            try:
+                with span("connect", "net", host=self._dns_host, ip=ip):
+                    return connection.create_connection(
+                        (ip, self.port),
+                        self.timeout,
+                        source_address=self.source_address,
+                        socket_options=self.socket_options,
+                    )
+            except OSError as e:
+                error = e
+
+        dns_cache.invalidate(self._dns_host)
+        if isinstance(error, TimeoutError):
+            raise ConnectTimeoutError(
+                self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})") from error
+        raise NewConnectionError(self, f"Failed to establish a new connection: {error}") from error
+
+
+class CachedHTTPConnection(_CachedDNSMixin, HTTPConnection):
+    pass
+
+
+class CachedHTTPSConnection(_CachedDNSMixin, HTTPSConnection):
+    pass
+
+
+class CachedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = CachedHTTPConnection
+
+
+class CachedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = CachedHTTPSConnection
+
+
+class CachedDNSAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CachedHTTPConnectionPool,
+            "https": CachedHTTPSConnectionPool,
+        }
+
+
+def get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = CachedDNSAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+# ------------------------------------------------------------
+# Latencia por host (para decidir cuándo duplicar una petición)
+# ------------------------------------------------------------
+class HostLatency:
+    def __init__(self, window: int = 128, min_samples: int = HEDGE_MIN_SAMPLES):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._requests: Dict[str, int] = collections.Counter()
+        self._hedges: Dict[str, int] = collections.Counter()
+        self._lock = threading.Lock()
+
+    def record(self, host: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(host)
+            if samples is None:
+                samples = self._samples[host] = collections.deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, host: str, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(host, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def note_request(self, host: str):
+        with self._lock:
+            self._requests[host] += 1
+
+    def hedge_delay(self, host: str) -> Optional[float]:
+        # None = no duplicar: pocas muestras o presupuesto de duplicados agotado
+        with self._lock:
+            if self._hedges[host] >= self._requests[host] * HEDGE_BUDGET:
+                return None
+        delay = self.percentile(host, HEDGE_PERCENTILE)
+        return None if delay is None else max(HEDGE_MIN_DELAY, delay)
+
+    def note_hedge(self, host: str):
+        with self._lock:
+            self._hedges[host] += 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            counts = {host: (self._requests[host], self._hedges[host]) for host in self._samples}
+        return {
+            host: {
+                "p50": self.percentile(host, 0.5) or 0.0,
+                "p95": self.percentile(host, 0.95) or 0.0,
+                "requests": total,
+                "hedges": hedges,
+            }
+            for host, (total, hedges) in counts.items()
+        }
+
+
+latency = HostLatency()
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    # Exponencial acotada con jitter ("equal jitter"): entre cap/2 y cap.
+    # Un Retry-After numérico del servidor manda, con el mismo tope.
+    if retry_after and retry_after.strip().isdigit():
+        return min(BACKOFF_MAX, float(retry_after))
+    cap = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))
+    return cap / 2 + random.uniform(0, cap / 2)
+
+
+def _retryable(error: requests.RequestException) -> bool:
+    # Un timeout ya gastó el tiempo entero del intento: repetirlo multiplicaría
+    # la espera por URL. Solo se reintentan los cortes rápidos de conexión.
+    if isinstance(error, (requests.exceptions.SSLError, requests.Timeout)):
+        return False
+    return isinstance(error, (requests.ConnectionError, requests.exceptions.ChunkedEncodingError))
+
+
+def _wait_retry(token: CancelToken, delay: float) -> bool:
+    # No se reintenta si la espera no cabe en lo que queda de la ejecución
+    remaining = token.remaining()
+    if remaining is not None and delay >= remaining:
+        return False
+    return token.sleep(delay)
+
+
+def _hedge_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _hedge_pool
+    if _hedge_pool is None:
+        with _session_lock:
+            if _hedge_pool is None:
+                _hedge_pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=POOL_MAXSIZE, thread_name_prefix="net-hedge")
+    return _hedge_pool
+
+
+def _discard(future: concurrent.futures.Future):
+    # Respuesta perdedora del hedging: se libera la conexión
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def _send_hedged(url: str, host: str, delay: float, kwargs) -> requests.Response:
+    session = get_session()
+    pool = _hedge_executor()
+    first = pool.submit(session.get, url, **kwargs)
+    try:
+        return first.result(timeout=delay)
+    except concurrent.futures.TimeoutError:
+        pass
+
+    latency.note_hedge(host)
+    HTTP_HEDGES.inc(host=host)
+    pending = {first, pool.submit(session.get, url, **kwargs)}
+    error: Optional[BaseException] = None
+    while pending:
+        done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is not None:
+                error = future.exception()
+                continue
+            for other in pending:
+                other.add_done_callback(_discard)
+            for other in done - {future}:
+                _discard(other)
+            return future.result()
+    raise error
+
+
+def _send(url: str, hedge: bool, kwargs) -> requests.Response:
+    host = host_of(url)
+    delay = latency.hedge_delay(host) if hedge and HEDGE_ENABLED else None
+    latency.note_request(host)
+
+    with span(f"GET {host}", "http", url=url) as args:
+        inicio = time.monotonic()
+        try:
+            if delay is None:
+                resp = get_session().get(url, **kwargs)
+            else:
+                resp = _send_hedged(url, host, delay, kwargs)
+        except requests.RequestException as e:
+            observe_http(host, type(e).__name__)
+            raise
+        observe_http(host, str(resp.status_code), time.monotonic() - inicio)
+        if tracer.enabled:
+            # elapsed de requests = hasta recibir las cabeceras (TTFB). El tamaño
+            # sale de la cabecera: leer resp.content bloquearía con stream=True
+            length = resp.headers.get("Content-Length", "")
+            args.update(status=resp.status_code, ttfb_ms=int(resp.elapsed.total_seconds() * 1000),
+                        bytes=int(length) if length.isdigit() else None,
+                        hedge_after_ms=None if delay is None else int(delay * 1000))
+    if resp.status_code < 500:
+        latency.record(host, time.monotonic() - inicio)
+    return resp
+
+
+def get(url: str, retries: Optional[int] = None, hedge: bool = False, **kwargs) -> requests.Response:
+    # Respeta la fecha límite de la ejecución en curso
+    token = current_token()
+    token.raise_if_cancelled()
+    timeout = kwargs.get("timeout")
+    retries = HTTP_RETRIES if retries is None else retries
+
+    breaker = breakers.get(current_provider(), url)
+    if not breaker.allow():
+        raise CircuitOpen(f"{breaker.host} en pausa ({breaker.retry_in():.0f}s)")
+
+    # Cada intento fallido cuenta para el breaker, así un host caído se corta
+    # antes; en cuanto el circuito se abre se deja de reintentar
+    outcome = False
+    try:
+        attempt = 0
+        while True:
+            kwargs["timeout"] = token.timeout(timeout)
+            try:
+                resp = _send(url, hedge, kwargs)
+            except requests.RequestException as e:
+                # Un corte por la fecha límite de la ejecución no cuenta como caída del host
+                if token.cancelled:
+                    raise
+                breaker.record_failure()
+                outcome = True
+                if (attempt < retries and _retryable(e) and breaker.state == CLOSED
+                        and _wait_retry(token, backoff_delay(attempt))):
+                    HTTP_RETRY_TOTAL.inc(host=host_of(url))
+                    attempt += 1
+                    continue
+                raise
+
+            if resp.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            outcome = True
+
+            if (resp.status_code in RETRY_STATUSES and attempt < retries and breaker.state == CLOSED
+                    and _wait_retry(token, backoff_delay(attempt, resp.headers.get("Retry-After")))):
+                HTTP_RETRY_TOTAL.inc(host=host_of(url))
+                resp.close()
+                attempt += 1
+                continue
+            return resp
+    finally:
+        # Sin veredicto (fecha límite, cancelación): no deja colgada la prueba
+        if not outcome:
+            breaker.release_probe()
+
+
+def warm_up(urls: Iterable[str], verify: bool = True, timeout: float = 5) -> int:
+    # Abre las conexiones (DNS + TCP + TLS) por adelantado; devuelve cuántas respondieron
+    ok = 0
+    session = get_session()
+    for url in urls:
+        try:
+            session.head(url, timeout=timeout, verify=verify, allow_redirects=False)
+            ok += 1
+        except Exception:
+            continue
+    return ok
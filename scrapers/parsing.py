@@ -0,0 +1,75 @@
+from __future__ import annotations
+import asyncio
+import concurrent.futures
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from .config import setting
+from .tracing import span
+
+# Número de procesos para parsear HTML (PLOOSTREAM_PARSE_WORKERS). 0 = en el
+# mismo hilo (por defecto).
+# Con N > 0 el HTML viaja a un pool de procesos y vuelven registros simples
+# (tuplas, dicts, str), nunca objetos BeautifulSoup, así el parseo usa
+# varios núcleos en lugar de competir por el GIL.
+PARSE_WORKERS = setting("PARSE_WORKERS", 0)
+
+
+class ParsePool:
+    def __init__(self, workers: int = PARSE_WORKERS):
+        self.workers = workers
+        self._pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def offloaded(self) -> bool:
+        return self.workers > 0
+
+    def _executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def run(self, fn: Callable[..., Any], *args) -> Any:
+        with span(fn.__name__, "parse", procesos=self.workers):
+            if not self.offloaded:
+                return fn(*args)
+            try:
+                return self._executor().submit(fn, *args).result()
+            except BrokenProcessPool:
+                self._disable()
+                return fn(*args)
+
+    async def run_async(self, fn: Callable[..., Any], *args) -> Any:
+        # El loop es compartido (servidor, DNS, Playwright, sondeo): sin procesos
+        # el parseo va al pool de hilos por defecto, nunca dentro del loop
+        loop = asyncio.get_running_loop()
+        with span(fn.__name__, "parse", procesos=self.workers):
+            if not self.offloaded:
+                return await loop.run_in_executor(None, fn, *args)
+            try:
+                return await loop.run_in_executor(self._executor(), fn, *args)
+            except BrokenProcessPool:
+                self._disable()
+                return await loop.run_in_executor(None, fn, *args)
+
+    def _disable(self):
+        # Un pool roto (proceso muerto, entorno sin fork/spawn) no debe tumbar el scraping
+        print("[Parse] Pool de procesos roto, se parsea en el mismo proceso")
+        with self._lock:
+            self.workers = 0
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+parse_pool = ParsePool()
@@ -0,0 +1,19 @@
+import os
+
+from .config import load_env
+
+# Carpeta de datos locales (estadísticas, snapshots, trazas).
+# En Windows va a %APPDATA%\Ploostream; se puede cambiar con PLOOSTREAM_DATA_DIR.
+def data_dir() -> str:
+    load_env()
+    path = os.environ.get("PLOOSTREAM_DATA_DIR")
+    if not path:
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+        folder = "Ploostream" if os.environ.get("APPDATA") else ".ploostream"
+        path = os.path.join(base, folder)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def data_file(name: str) -> str:
+    return os.path.join(data_dir(), name)
@@ -0,0 +1,168 @@
+from __future__ import annotations
+import asyncio
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from . import aio
+from .cancel import current_token
+from .config import setting
+from .context import current_provider
+from .metrics import CACHE_HITS, CACHE_MISSES
+from .models import Event, Stream
+from .progress import PROBE, progress
+
+HEALTH_OK = "ok"
+HEALTH_DEAD = "dead"
+HEALTH_UNKNOWN = "unknown"
+
+CONCURRENCY = setting("PROBE_CONCURRENCY", 32)
+PROBE_TIMEOUT = setting("PROBE_TIMEOUT", 6.0)
+OK_TTL = setting("PROBE_OK_TTL", 600)       # un stream vivo se vuelve a sondear a los 10 minutos
+DEAD_TTL = setting("PROBE_DEAD_TTL", 180)   # uno caído, antes: puede volver en cualquier momento
+
+# Respuestas que indican que el servidor existe pero no deja sondear
+_PROTECTED = {401, 403, 429}
+
+_RANK = {HEALTH_OK: 0, None: 1, HEALTH_UNKNOWN: 1, HEALTH_DEAD: 2}
+
+PROBE_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:128.0) Gecko/20100101 Firefox/128.0"
+}
+
+
+# Comprueba en paralelo que las URLs de los streams respondan (HEAD y, si el
+# servidor no lo admite, un GET de un byte). Los resultados se cachean por URL
+# y cada Stream queda anotado con health/latency_ms.
+class StreamProber:
+    def __init__(self, concurrency: int = CONCURRENCY, timeout: float = PROBE_TIMEOUT,
+                 ok_ttl: float = OK_TTL, dead_ttl: float = DEAD_TTL):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.ok_ttl = ok_ttl
+        self.dead_ttl = dead_ttl
+        self.hits = 0
+        self.misses = 0
+
+        self._cache: Dict[str, Tuple[str, Optional[int], float]] = {}
+        self._lock = threading.Lock()
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    # ------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------
+    def annotate(self, events: List[Event], prune_dead: bool = False) -> List[Event]:
+        token = current_token()
+        if token.cancelled or not any(e.streams for e in events):
+            return events
+        budget = token.timeout(self.timeout * 4)
+        urls = {s.url for e in events for s in e.streams}
+        # Una unidad de progreso por URL distinta, no por stream
+        progress.grow(PROBE, len(urls))
+        try:
+            results = aio.run(self._probe_all(urls, current_provider()), timeout=budget)
+        except Exception:
+            # Sin tiempo o sin red: se usa lo que haya en caché
+            results = {}
+
+        for e in events:
+            for s in e.streams:
+                health, latency = results.get(s.url) or self._cached(s.url) or (HEALTH_UNKNOWN, None)
+                s.health, s.latency_ms = health, latency
+            if prune_dead:
+                e.streams = [s for s in e.streams if s.health != HEALTH_DEAD]
+            e.streams.sort(key=_stream_rank)
+        return events
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {HEALTH_OK: 0, HEALTH_DEAD: 0, HEALTH_UNKNOWN: 0}
+            for health, _, _ in self._cache.values():
+                counts[health] = counts.get(health, 0) + 1
+        counts.update(hits=self.hits, misses=self.misses)
+        return counts
+
+    # ------------------------------------------------------------
+    # Interno (event loop compartido)
+    # ------------------------------------------------------------
+    def _cached(self, url: str) -> Optional[Tuple[str, Optional[int]]]:
+        with self._lock:
+            entry = self._cache.get(url)
+        if entry and entry[2] > time.monotonic():
+            return entry[0], entry[1]
+        return None
+
+    async def _probe_all(self, urls, provider: str = "") -> Dict[str, Tuple[str, Optional[int]]]:
+        # Las corrutinas corren en el loop, fuera del ámbito del proveedor:
+        # el progreso se anota con su nombre explícito
+        async def probe(url: str) -> Tuple[str, Optional[int]]:
+            try:
+                return await self._probe(url)
+            finally:
+                progress.advance(PROBE, provider=provider)
+
+        results = {}
+        pending = []
+        for url in urls:
+            cached = self._cached(url)
+            if cached is not None:
+                self.hits += 1
+                results[url] = cached
+            else:
+                self.misses += 1
+                pending.append(url)
+        if results:
+            progress.advance(PROBE, len(results), provider=provider)
+
+        for url, result in zip(pending, await asyncio.gather(*(probe(u) for u in pending))):
+            results[url] = result
+        return results
+
+    async def _probe(self, url: str) -> Tuple[str, Optional[int]]:
+        async with self._semaphore:
+            inicio = time.monotonic()
+            try:
+                status = await self._request(url)
+            except Exception:
+                status = None
+            latency = int((time.monotonic() - inicio) * 1000)
+
+        if status is None or status == 404 or status == 410 or status >= 500:
+            health, ttl = HEALTH_DEAD, self.dead_ttl
+        elif status in _PROTECTED:
+            health, ttl = HEALTH_UNKNOWN, self.dead_ttl
+        else:
+            health, ttl = HEALTH_OK, self.ok_ttl
+
+        latency = latency if health == HEALTH_OK else None
+        with self._lock:
+            self._cache[url] = (health, latency, time.monotonic() + ttl)
+        return health, latency
+
+    async def _request(self, url: str) -> int:
+        import aiohttp
+
+        session = await aio.client_session(
+            "probe",
+            headers=PROBE_HEADERS,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            limit=self.concurrency,
+            ssl=False,
+        )
+
+        async with session.head(url, allow_redirects=True) as resp:
+            if resp.status not in (405, 501) and resp.status not in _PROTECTED:
+                return resp.status
+        # Algunos servidores rechazan HEAD: GET ligero de un solo byte
+        async with session.get(url, headers={"Range": "bytes=0-0"}, allow_redirects=True) as resp:
+            return resp.status
+
+
+def _stream_rank(stream: Stream) -> int:
+    # Solo por estado: ordenar por latencia movería los streams en cada sondeo
+    return _RANK.get(stream.health, 1)
+
+
+stream_prober = StreamProber()
+CACHE_HITS.source(lambda: {("probe",): stream_prober.hits})
+CACHE_MISSES.source(lambda: {("probe",): stream_prober.misses})
@@ -0,0 +1,155 @@
+from __future__ import annotations
+import copy
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .context import current_provider
+
+# Etapas que publican los proveedores
+RUN = "ejecución"
+LISTING = "listado"
+PAGES = "páginas"
+STREAMS = "streams"
+PLAYWRIGHT = "playwright"
+PROBE = "sondeo"
+
+
+class StageProgress:
+    def __init__(self, provider: str, stage: str, total: Optional[int] = None):
+        self.provider = provider
+        self.stage = stage
+        self.total = total
+        self.done = 0
+        self.started = time.monotonic()
+        self.updated = self.started
+        self.finished = False
+
+    @property
+    def fraction(self) -> Optional[float]:
+        if self.finished:
+            return 1.0
+        if not self.total:
+            return None
+        return min(1.0, self.done / self.total)
+
+    def eta(self) -> Optional[float]:
+        # Ritmo medio de la etapa hasta ahora aplicado a lo que falta
+        if self.finished:
+            return 0.0
+        if not self.total or not self.done:
+            return None
+        elapsed = self.updated - self.started
+        return max(0.0, (self.total - self.done) * elapsed / self.done)
+
+    def copy(self) -> "StageProgress":
+        return copy.copy(self)
+
+    def describe(self) -> str:
+        if self.finished:
+            cuenta = f"{self.done}/{self.total}" if self.total else "ok"
+            return f"{self.stage}: {cuenta} en {self.updated - self.started:.0f}s"
+        texto = f"{self.stage}: {self.done}/{self.total}" if self.total is not None else f"{self.stage}…"
+        eta = self.eta()
+        if eta is not None:
+            texto += f" · ETA {eta:.0f}s"
+        return texto
+
+    def to_dict(self) -> dict:
+        eta = self.eta()
+        return {
+            "provider": self.provider,
+            "stage": self.stage,
+            "done": self.done,
+            "total": self.total,
+            "finished": self.finished,
+            "elapsed": round(self.updated - self.started, 1),
+            "eta": None if eta is None else round(eta, 1),
+        }
+
+
+# Bus de progreso en proceso. Los proveedores publican etapas (listado,
+# páginas N/M, streams resueltos, trabajos de Playwright) y la GUI, la CLI y
+# el servidor se suscriben. El proveedor sale del contexto de la ejecución.
+class ProgressBus:
+    def __init__(self):
+        self._stages: Dict[Tuple[str, str], StageProgress] = {}
+        self._listeners: List[Callable[[StageProgress], None]] = []
+        self._lock = threading.Lock()
+
+    def reset(self, provider: Optional[str] = None):
+        provider = provider or current_provider()
+        with self._lock:
+            for key in [k for k in self._stages if k[0] == provider]:
+                del self._stages[key]
+
+    def begin(self, stage: str, total: Optional[int] = None, provider: Optional[str] = None):
+        provider = provider or current_provider()
+        if not provider:
+            return
+        with self._lock:
+            progress = self._stages[(provider, stage)] = StageProgress(provider, stage, total)
+            snapshot = progress.copy()
+        self._notify(snapshot)
+
+    def grow(self, stage: str, n: int = 1, provider: Optional[str] = None):
+        # Etapas cuyo total se descubre sobre la marcha (streams de cada página)
+        self._update(stage, provider, lambda p: setattr(p, "total", (p.total or 0) + n))
+
+    def advance(self, stage: str, n: int = 1, provider: Optional[str] = None):
+        self._update(stage, provider, lambda p: setattr(p, "done", p.done + n))
+
+    def finish(self, stage: str, provider: Optional[str] = None):
+        self._update(stage, provider, lambda p: setattr(p, "finished", True))
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            return [p.to_dict() for p in self._stages.values()]
+
+    def stages(self, provider: str) -> List[StageProgress]:
+        with self._lock:
+            return [p.copy() for (name, _), p in self._stages.items() if name == provider]
+
+    def current(self, provider: str) -> Optional[StageProgress]:
+        # Etapa principal en curso: la primera que empezó y sigue sin terminar
+        stages = self.stages(provider)
+        run = next((p for p in stages if p.stage == RUN), None)
+        if run is None or run.finished:
+            return run
+        active = [p for p in stages if p.stage != RUN and not p.finished]
+        return min(active, key=lambda p: p.started) if active else run
+
+    def subscribe(self, listener: Callable[[StageProgress], None]):
+        with self._lock:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[StageProgress], None]):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def _update(self, stage: str, provider: Optional[str], change: Callable[[StageProgress], None]):
+        provider = provider or current_provider()
+        if not provider:
+            return
+        with self._lock:
+            progress = self._stages.get((provider, stage))
+            if progress is None:
+                progress = self._stages[(provider, stage)] = StageProgress(provider, stage)
+            change(progress)
+            progress.updated = time.monotonic()
+            snapshot = progress.copy()
+        self._notify(snapshot)
+
+    def _notify(self, progress: StageProgress):
+        # Fuera del lock y con una copia: los oyentes solo deben encolar o apuntar
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(progress)
+            except Exception as e:
+                print(f"[Progress] Error en un suscriptor: {e}")
+
+
+progress = ProgressBus()
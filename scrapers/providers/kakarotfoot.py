@@ -1,19 +1,26 @@
-import requests
 from typing import List
+from urllib.parse import urljoin
 from ..models import Event, Stream
 from ..base import BaseProvider
+from ..config import ProviderSettings
+from .. import net
+from ..progress import LISTING, progress
 from .utils.logos import get_team_logo
 
 class KakarotfootProvider(BaseProvider):
     name = "Kakarotfoot"
-    FEED = "https://kakarotfoot.ru/json.php"
+    defaults = ProviderSettings(url="https://kakarotfoot.ru/json.php", timeout=10)
 
     def fetch_events(self) -> List[Event]:
         events = []
+        progress.begin(LISTING)
         try:
-            data = requests.get(self.FEED, timeout=10).json()
+            data = net.get(self.settings.url, timeout=self.settings.timeout,
+                           headers=self.settings.headers).json()
         except:
             return events
+        finally:
+            progress.finish(LISTING)
 
         for obj in data:
             es_channels = obj.get("streams", [])
@@ -25,7 +32,7 @@ class KakarotfootProvider(BaseProvider):
             event = Event(
                 id=obj["id"],
                 name=f"{home} vs {away}",
-                url=f"https://kakarotfoot.ru/{obj['url']}",
+                url=urljoin(self.settings.url, obj["url"]),
                 league=league,
                 home=home,
                 away=away,
@@ -46,7 +53,7 @@ class KakarotfootProvider(BaseProvider):
 
                 event.streams.append(Stream(
                     name=display,
-                    url=f"https://kakarotfoot.ru/yu/3/{ch}",
+                    url=urljoin(self.settings.url, f"/yu/3/{ch}"),
                     language=lang,
                     source="Kakarotfoot"
                 ))
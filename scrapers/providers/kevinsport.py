@@ -1,166 +1,309 @@
 from __future__ import annotations
 import asyncio
+import time
 import aiohttp
 from bs4 import BeautifulSoup
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
 
+from .. import aio, net
 from ..base import BaseProvider
+from ..breaker import CLOSED, CircuitOpen, breakers
+from ..config import ProviderSettings
+from ..coordinator import SingleFlight
+from ..cancel import current_token
+from ..dns import dns_cache, host_of
 from ..models import Event, Stream
+from ..parsing import parse_pool
+from ..metrics import HTTP_RETRY_TOTAL, observe_http
+from ..progress import LISTING, PAGES, STREAMS, progress
+from ..tracing import span
 from .utils.logos import get_team_logo
 
+# ============================================================
+# PARSEO (funciones de módulo: se pueden ejecutar en el pool de procesos)
+# Los enlaces relativos se resuelven contra la página de la que salen, así
+# PLOOSTREAM_KEVINSPORT_URL puede apuntar a un espejo.
+# ============================================================
+
+def parse_listing(html: str, page_url: str) -> List[Dict[str, str]]:
+    soup = BeautifulSoup(html, "html.parser")
+    rows = soup.select("table.table-hover tr")
+    current_league = "(Desconocido)"
+    matches = []
+
+    for row in rows:
+        classes = row.get("class", [])
+
+        # FILA DE LIGA
+        if "table-info" in classes:
+            txt = row.get_text(strip=True)
+            if txt:
+                current_league = txt
+            continue
+
+        # FILA DE PARTIDO
+        if "table-dark" not in classes:
+            continue
+
+        # Hora
+        time_td = row.find("td", class_="matchtime")
+        match_time = time_td.get_text(strip=True) if time_td else ""
+
+        # Equipos
+        title_td = row.find("td", class_="pnltblttl")
+        title = title_td.get_text(strip=True) if title_td else "Unknown"
+
+        if " Vs " in title:
+            home, away = title.split(" Vs ", 1)
+        else:
+            home, away = title, ""
+
+        # Link de Watch
+        watch = row.find("a", href=True)
+        if not watch:
+            continue
+
+        event_page = urljoin(page_url, watch["href"])
+
+        matches.append({
+            "league": current_league,
+            "match_time": match_time,
+            "home": home,
+            "away": away,
+            "event_page": event_page,
+        })
+
+    return matches
+
+
+def parse_event_page(html: str, page_url: str) -> Dict[str, Any]:
+    soup = BeautifulSoup(html, "html.parser")
+    iframes = [
+        fr["src"] for fr in soup.find_all("iframe", src=True)
+        if fr["src"].startswith(("http", "//"))
+    ]
+
+    # Iframe principal
+    main = None
+    iframe = soup.find("iframe")
+    if iframe and iframe.get("src"):
+        main = urljoin(page_url, iframe["src"])
+
+    # Streams secundarios: (texto del botón, url)
+    buttons: List[Tuple[str, str]] = []
+    for btn in soup.find_all("a", string=lambda t: t and "Stream" in t):
+        href = btn.get("href")
+        if not href:
+            continue
+        buttons.append((btn.get_text(strip=True), urljoin(page_url, href)))
+
+    return {"iframe": main, "iframes": iframes, "buttons": buttons}
+
+
+def parse_stream_page(html: str, page_url: str) -> Optional[str]:
+    soup = BeautifulSoup(html, "html.parser")
+    iframe = soup.find("iframe")
+    if not iframe or not iframe.get("src"):
+        return None
+    return urljoin(page_url, iframe["src"])
+
+
 class KevinsportProvider(BaseProvider):
     name = "KevinSport"
-    URL = "https://kevinsport.pro/live/football/"
+    is_async = True
+    defaults = ProviderSettings(url="https://kevinsport.pro/live/football/", timeout=15, concurrency=20)
 
-    def fetch_events(self) -> List[Event]:
+    async def fetch_events(self) -> List[Event]:
         try:
-            return asyncio.run(self.fetch_events_async())
+            return await self._fetch_events()
         except Exception as e:
             print(f"[KevinSport] Error en fetch_events: {e}")
             return []
 
-    async def fetch_events_async(self) -> List[Event]:
+    async def _fetch_events(self) -> List[Event]:
         events: List[Event] = []
+        token = current_token()
 
-        timeout = aiohttp.ClientTimeout(total=15)
-        async with aiohttp.ClientSession(
-            headers={"User-Agent": "Mozilla/5.0"},
-            timeout=timeout
-        ) as session:
+        # Sesión compartida del loop: conexiones, DNS y TLS se reutilizan entre ejecuciones
+        session = await aio.client_session()
+        progress.begin(LISTING)
+        # Páginas de evento y de stream descargándose a la vez como máximo
+        self._semaphore = asyncio.Semaphore(max(1, self.settings.concurrency))
+        try:
             try:
-                async with session.get(self.URL) as resp:
-                    html = await resp.text()
+                html = await self._fetch_text(session, self.settings.url)
             except Exception as e:
                 print(f"[KevinSport] Error descargando página principal: {e}")
                 return events
+            matches = await parse_pool.run_async(parse_listing, html, self.settings.url)
+        finally:
+            progress.finish(LISTING)
+        progress.begin(PAGES, total=len(matches))
+        progress.begin(STREAMS, total=0)
 
-            soup = BeautifulSoup(html, "html.parser")
-            rows = soup.select("table.table-hover tr")
-            current_league = "(Desconocido)"
-            tasks = []
+        tasks = []
+        # Subpáginas de stream compartidas entre eventos: una descarga por URL y ejecución
+        flights = SingleFlight("subpage")
 
-            for row in rows:
-                classes = row.get("class", [])
+        for row in matches:
+            home, away = row["home"], row["away"]
+            match_time = row["match_time"]
+            current_league = row["league"]
+            event_page = row["event_page"]
 
-                # FILA DE LIGA
-                if "table-info" in classes:
-                    txt = row.get_text(strip=True)
-                    if txt:
-                        current_league = txt
-                    continue
+            name_final = (
+                f"{home} vs {away} ({match_time})"
+                if match_time else f"{home} vs {away}"
+            )
 
-                # FILA DE PARTIDO
-                if "table-dark" not in classes:
-                    continue
+            event = Event(
+                id=event_page,
+                name=name_final,
+                url=event_page,
+                league=current_league,
+                home=home,
+                away=away,
+                start_time=0,
+                provider="KevinSport",
+                match_time=match_time,
+                streams=[],
+                home_logo=get_team_logo(home),
+                away_logo=get_team_logo(away),
+                league_logo=get_team_logo(current_league)
+            )
 
-                # Hora
-                time_td = row.find("td", class_="matchtime")
-                match_time = time_td.get_text(strip=True) if time_td else ""
+            events.append(event)
+            tasks.append(self._load_streams_async(session, event, flights))
 
-                # Equipos
-                title_td = row.find("td", class_="pnltblttl")
-                title = title_td.get_text(strip=True) if title_td else "Unknown"
+        dns_cache.prefetch(e.url for e in events)
 
-                if " Vs " in title:
-                    home, away = title.split(" Vs ", 1)
-                else:
-                    home, away = title, ""
+        try:
+            if tasks:
+                # Lo que no termine antes de la fecha límite se cancela y se reporta
+                futures = [asyncio.ensure_future(t) for t in tasks]
+                _, pending = await asyncio.wait(futures, timeout=token.remaining())
+                if pending:
+                    for t in pending:
+                        t.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
+                    token.note_unfinished(f"{self.name}: {len(pending)} eventos con streams incompletos")
+        except Exception as e:
+            print(f"[KevinSport] Error en gather de streams: {e}")
+        finally:
+            flights.cancel_pending()
+            
+        return events
+
+    async def _fetch_text(self, session, url: str) -> str:
+        breaker = breakers.get(self.name, url)
+        if not breaker.allow():
+            raise CircuitOpen(f"{breaker.host} en pausa ({breaker.retry_in():.0f}s)")
+
+        token = current_token()
+        host = host_of(url)
+        outcome = False
+        try:
+            attempt = 0
+            while True:
+                try:
+                    async with self._semaphore:
+                        # Tras la espera del semáforo; con la fecha límite vencida el
+                        # tiempo restante es 0, que para aiohttp es "sin límite"
+                        total = token.timeout(self.settings.timeout)
+                        token.raise_if_cancelled()
+                        timeout = aiohttp.ClientTimeout(total=total)
+                        inicio = time.monotonic()
+                        async with session.get(url, headers=self.settings.headers, timeout=timeout) as resp:
+                            html = await resp.text()
+                            status = resp.status
+                            retry_after = resp.headers.get("Retry-After")
+                        observe_http(host, str(status), time.monotonic() - inicio)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    observe_http(host, type(e).__name__)
+                    # Igual que net.get: cada intento cuenta para el breaker y un
+                    # timeout (ya gastó el intento entero) no se repite
+                    if token.cancelled:
+                        raise
+                    breaker.record_failure()
+                    outcome = True
+                    if (attempt < net.HTTP_RETRIES and not isinstance(e, asyncio.TimeoutError)
+                            and breaker.state == CLOSED
+                            and await self._backoff(token, net.backoff_delay(attempt))):
+                        HTTP_RETRY_TOTAL.inc(host=host)
+                        attempt += 1
+                        continue
+                    raise
 
-                name_final = (
-                    f"{home} vs {away} ({match_time})"
-                    if match_time else f"{home} vs {away}"
-                )
+                if status >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                outcome = True
 
-                # Link de Watch
-                watch = row.find("a", href=True)
-                if not watch:
+                if (status in net.RETRY_STATUSES and attempt < net.HTTP_RETRIES and breaker.state == CLOSED
+                        and await self._backoff(token, net.backoff_delay(attempt, retry_after))):
+                    HTTP_RETRY_TOTAL.inc(host=host)
+                    attempt += 1
                     continue
-                    
-                event_page = watch["href"]
-                if not event_page.startswith("http"):
-                    event_page = f"https://kevinsport.pro{event_page}"
-
-                event = Event(
-                    id=event_page,
-                    name=name_final,
-                    url=event_page,
-                    league=current_league,
-                    home=home,
-                    away=away,
-                    start_time=0,
-                    provider="KevinSport",
-                    match_time=match_time,
-                    streams=[],
-                    home_logo=get_team_logo(home),
-                    away_logo=get_team_logo(away),
-                    league_logo=get_team_logo(current_league)
-                )
-
-                events.append(event)
-                tasks.append(self._load_streams_async(session, event))
+                return html
+        finally:
+            # Cancelada o cortada por la fecha límite: la prueba del breaker queda libre
+            if not outcome:
+                breaker.release_probe()
 
-            try:
-                await asyncio.gather(*tasks, return_exceptions=True)
-            except Exception as e:
-                print(f"[KevinSport] Error en gather de streams: {e}")
-                
-            return events
+    @staticmethod
+    async def _backoff(token, delay: float) -> bool:
+        remaining = token.remaining()
+        if token.cancelled or (remaining is not None and delay >= remaining):
+            return False
+        await asyncio.sleep(delay)
+        return not token.cancelled
 
-    async def _load_streams_async(self, session, event: Event):
+    async def _load_streams_async(self, session, event: Event, flights: SingleFlight):
         try:
-            async with session.get(event.url) as r:
-                html = await r.text()
+            with span(f"{event.home} vs {event.away}", "event", url=event.url) as args:
+                await self._load_streams(session, event, flights)
+                args["streams"] = len(event.streams)
+        finally:
+            progress.advance(PAGES)
+
+    async def _load_streams(self, session, event: Event, flights: SingleFlight):
+        try:
+            html = await self._fetch_text(session, event.url)
         except Exception as e:
             print(f"[KevinSport] Error cargando evento {event.url}: {e}")
             return
 
-        soup = BeautifulSoup(html, "html.parser")
+        page = await parse_pool.run_async(parse_event_page, html, event.url)
+        dns_cache.prefetch(page["iframes"])
 
         # Iframe principal
-        iframe = soup.find("iframe")
-        if iframe:
-            src = iframe.get("src")
-            if src:
-                if not src.startswith("http"):
-                    src = f"https:{src}" if src.startswith("//") else f"https://kevinsport.pro{src}"
-                    
-                event.streams.append(Stream(
-                    name="Stream 1",
-                    url=src,
-                    source="KevinSport"
-                ))
+        if page["iframe"]:
+            event.streams.append(Stream(
+                name="Stream 1",
+                url=page["iframe"],
+                source="KevinSport"
+            ))
 
         # Streams secundarios
-        stream_buttons = soup.find_all("a", string=lambda t: t and "Stream" in t)
-
-        for btn in stream_buttons:
-            href = btn.get("href")
-            if not href:
-                continue
-                
-            if not href.startswith("http"):
-                href = f"https://kevinsport.pro{href}"
-
+        progress.grow(STREAMS, len(page["buttons"]))
+        for label, href in page["buttons"]:
             try:
-                async with session.get(href) as r2:
-                    sub_html = await r2.text()
+                src = await flights.do_async(href, lambda: self._fetch_stream_page(session, href))
             except Exception as e:
                 print(f"[KevinSport] Error en stream secundario {href}: {e}")
                 continue
+            finally:
+                progress.advance(STREAMS)
 
-            sub_soup = BeautifulSoup(sub_html, "html.parser")
-            sub_iframe = sub_soup.find("iframe")
-
-            if not sub_iframe:
-                continue
-
-            src = sub_iframe.get("src")
             if src:
-                if not src.startswith("http"):
-                    src = f"https:{src}" if src.startswith("//") else f"https://kevinsport.pro{src}"
-                    
                 event.streams.append(Stream(
-                    name=btn.get_text(strip=True),
+                    name=label,
                     url=src,
                     source="KevinSport"
                 ))
+
+    async def _fetch_stream_page(self, session, url: str) -> Optional[str]:
+        html = await self._fetch_text(session, url)
+        return await parse_pool.run_async(parse_stream_page, html, url)
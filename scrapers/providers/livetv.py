@@ -1,216 +1,239 @@
 from __future__ import annotations
-from typing import List
+from typing import Dict, List, Optional, Tuple
 import re
-import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import urllib3
 import concurrent.futures
-from datetime import datetime
-from playwright.sync_api import sync_playwright
+import contextvars
 
 from ..base import BaseProvider
+from ..config import ProviderSettings
+from .. import net
+from ..browser import browser_resolver
+from ..cancel import current_token
+from ..coordinator import SingleFlight
+from ..dns import dns_cache
+from ..parsing import parse_pool
+from ..progress import LISTING, PAGES, STREAMS, progress
+from ..tracing import span
+from ..strategies import strategy_key, strategy_memory
 from ..models import Event, Stream
 from .utils.logos import get_team_logo
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-UA_HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:128.0) Gecko/20100101 Firefox/128.0"
-}
+# Iframes válidos del webplayer; el resolvedor espera a que aparezcan
+PW_IFRAME_SELECTOR = 'iframe[src*="emb"], iframe[src*="youtube.com/embed"]'
 
-class LiveTVProvider(BaseProvider):
-    name = "LiveTV"
-    LIST_URL = "https://livetv.sx/enx/allupcoming/"
+EMBED_RE = re.compile(r'(https?://[^"\']+embed[^"\']+)')
+
+# Orden por defecto; strategy_memory lo reordena según el historial de cada host
+STRATEGIES = ["iframe", "script", "playwright"]
+
+# ============================================================
+# PARSEO (a nivel de módulo para poder ejecutarse en el pool de procesos)
+# ============================================================
+def parse_listing(html: str, page_url: str) -> List[Tuple[str, str, str, str]]:
+    soup = BeautifulSoup(html, "html.parser")
+    event_data = []
+
+    for a_tag in soup.find_all("a", class_="live", href=True):
+        td_parent = a_tag.find_parent("td")
+        if not td_parent:
+            continue
+
+        if not td_parent.find("img", src="//cdn.livetv869.me/img/live.gif"):
+            continue
+
+        event_url = urljoin(page_url, a_tag["href"])
+        event_text = a_tag.get_text(strip=True)
+
+        home = away = league = ""
+
+        for sep in [" – ", " - ", " vs ", " Vs ", " v ", "–", "-"]:
+            if sep in event_text:
+                home, away = map(str.strip, event_text.split(sep, 1))
+                break
+
+        span = td_parent.find("span", class_="evdesc")
+        if span:
+            parts = span.get_text("|").split("|")
+            if len(parts) > 1:
+                league = parts[1].strip(" ()")
 
+        event_data.append((event_url, home, away, league))
+
+    return event_data
+
+
+def parse_event_page(html: str) -> List[str]:
+    soup = BeautifulSoup(html, "html.parser")
+    stream_urls = []
+
+    for table in soup.find_all("table", class_="lnktbj"):
+        play_link = table.find("a", href=True)
+        if not play_link or "webplayer2.php" not in play_link["href"]:
+            continue
+        stream_urls.append(urljoin("https://cdn.livetv869.me/", play_link["href"]))
+
+    return stream_urls
+
+
+def parse_webplayer(html: str, stream_url: str) -> Dict[str, Optional[str]]:
+    # Resultado de todas las estrategias estáticas con un único parseo
+    soup2 = BeautifulSoup(html, "html.parser")
+    return {
+        "iframe": _from_iframes(soup2, stream_url),
+        "script": _from_scripts(soup2),
+    }
+
+
+def _from_iframes(soup2, stream_url: str) -> str | None:
     # ============================================================
-    # FETCH EVENTS
+    # 1) First: original YOUTUBE logic (height=480 or allowfullscreen)
     # ============================================================
-    def fetch_events(self) -> List[Event]:
-        events: List[Event] = []
+    for fr in soup2.find_all("iframe"):
+        src = fr.get("src")
+        if not src:
+            continue
 
-        try:
-            resp = requests.get(self.LIST_URL, headers=UA_HEADERS, timeout=20, verify=False)
-            resp.raise_for_status()
-        except Exception as e:
-            print("[LiveTV] Error al descargar LIST_URL:", e)
-            return events
+        full = urljoin(stream_url, src)
 
-        soup = BeautifulSoup(resp.text, "html.parser")
-        event_data = []
+        h = fr.get("height")
+        allow = fr.get("allowfullscreen")
 
-        for a_tag in soup.find_all("a", class_="live", href=True):
-            td_parent = a_tag.find_parent("td")
-            if not td_parent:
-                continue
+        # YOUTUBE by old logic
+        if h == "480" or allow == "true":
+            return full
 
-            if not td_parent.find("img", src="//cdn.livetv869.me/img/live.gif"):
-                continue
+        # Modern youtube detection
+        if "youtube.com/embed" in full.lower():
+            return full
+
+        # EMB logic
+        if "emb" in full.lower():
+            return full
+
+    return None
 
-            event_url = urljoin("https://livetv.sx", a_tag["href"])
-            event_text = a_tag.get_text(strip=True)
 
-            home = away = league = date_text = ""
+def _from_scripts(soup2) -> str | None:
+    # ============================================================
+    # 2) Script-based URL (old logic)
+    # ============================================================
+    for script in soup2.find_all("script"):
+        content = script.string or ""
+        m = EMBED_RE.search(content)
+        if m:
+            return m.group(1)
+
+    return None
 
-            for sep in [" – ", " - ", " vs ", " Vs ", " v ", "–", "-"]:
-                if sep in event_text:
-                    home, away = map(str.strip, event_text.split(sep, 1))
-                    break
 
-            span = td_parent.find("span", class_="evdesc")
-            if span:
-                parts = span.get_text("|").split("|")
-                if len(parts) > 1:
-                    league = parts[1].strip(" ()")
+class LiveTVProvider(BaseProvider):
+    name = "LiveTV"
+    defaults = ProviderSettings(
+        url="https://livetv.sx/enx/allupcoming/",
+        timeout=20,
+        concurrency=10,
+        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:128.0) Gecko/20100101 Firefox/128.0",
+        playwright=True,
+    )
 
-            event_data.append((event_url, home, away, league))
+    # ============================================================
+    # FETCH EVENTS
+    # ============================================================
+    def fetch_events(self) -> List[Event]:
+        events: List[Event] = []
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
+        progress.begin(LISTING)
+        try:
+            try:
+                resp = net.get(self.settings.url, headers=self.settings.headers,
+                               timeout=self.settings.timeout, verify=False)
+                resp.raise_for_status()
+            except Exception as e:
+                print("[LiveTV] Error al descargar la lista:", e)
+                return events
+            event_data = parse_pool.run(parse_listing, resp.text, self.settings.url)
+        finally:
+            progress.finish(LISTING)
+        progress.begin(PAGES, total=len(event_data))
+        progress.begin(STREAMS, total=0)
+
+        # Resolver los hosts ya: el DNS no retrasa las descargas de detalle
+        dns_cache.prefetch([d[0] for d in event_data] + ["https://cdn.livetv869.me/"])
+
+        token = current_token()
+        # Muchos eventos enlazan el mismo webplayer: una descarga y resolución por URL y ejecución
+        flights = SingleFlight("webplayer")
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, self.settings.concurrency))
+        try:
+            # Cada worker recibe una copia del contexto para ver el token de la ejecución
             future_to_event = {
-                executor.submit(self._build_event_with_streams, *data): data[0]
+                executor.submit(contextvars.copy_context().run, self._build_event_with_streams, flights, *data): data[0]
                 for data in event_data
             }
-            for future in concurrent.futures.as_completed(future_to_event):
-                try:
-                    event = future.result()
-                    if event:
-                        events.append(event)
-                except Exception as e:
-                    print(f"[LiveTV] ❌ Error en evento {future_to_event[future]}: {e}")
-
+            try:
+                for future in concurrent.futures.as_completed(future_to_event, timeout=token.remaining()):
+                    progress.advance(PAGES)
+                    try:
+                        event = future.result()
+                        if event:
+                            events.append(event)
+                    except Exception as e:
+                        print(f"[LiveTV] ❌ Error en evento {future_to_event[future]}: {e}")
+            except concurrent.futures.TimeoutError:
+                pending = sum(1 for f in future_to_event if not f.done())
+                token.note_unfinished(f"{self.name}: {pending} eventos sin terminar")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        strategy_memory.save()
         return events
 
 
     # ============================================================
     # SCRAP STREAMS WITH FALLBACK
     # ============================================================
-    def _build_event_with_streams(self, url: str, home: str, away: str, league: str) -> Event | None:
+    def _build_event_with_streams(self, flights: SingleFlight,
+                                  url: str, home: str, away: str, league: str) -> Event | None:
+        with span(f"{home} vs {away}", "event", url=url) as args:
+            event = self._build_event(flights, url, home, away, league)
+            args["streams"] = len(event.streams) if event else 0
+            return event
+
+    def _build_event(self, flights: SingleFlight,
+                     url: str, home: str, away: str, league: str) -> Event | None:
 
         # Load event page
         try:
-            resp = requests.get(url, headers=UA_HEADERS, timeout=20, verify=False)
+            # Páginas de detalle con hedging: una respuesta lenta no bloquea al worker
+            resp = net.get(url, headers=self.settings.headers, timeout=self.settings.timeout,
+                           verify=False, hedge=True)
             resp.raise_for_status()
         except:
             return None
 
-        soup = BeautifulSoup(resp.text, "html.parser")
+        stream_urls = parse_pool.run(parse_event_page, resp.text)
+        progress.grow(STREAMS, len(stream_urls))
         streams = []
         found = 0
 
-        for table in soup.find_all("table", class_="lnktbj"):
-
-            play_link = table.find("a", href=True)
-            if not play_link or "webplayer2.php" not in play_link["href"]:
-                continue
+        dns_cache.prefetch(stream_urls)
 
-            stream_url = urljoin("https://cdn.livetv869.me/", play_link["href"])
+        token = current_token()
+        for stream_url in stream_urls:
+            if token.cancelled:
+                break
 
-            # Try normal request
             try:
-                r2 = requests.get(stream_url, headers=UA_HEADERS, timeout=20, verify=False)
-                r2.raise_for_status()
-            except:
-                continue
-
-            soup2 = BeautifulSoup(r2.text, "html.parser")
-
-            iframe_src = None
-
-            # ============================================================
-            # 1) First: original YOUTUBE logic (height=480 or allowfullscreen)
-            # ============================================================
-            for fr in soup2.find_all("iframe"):
-                src = fr.get("src")
-                if not src:
-                    continue
-                    
-                full = urljoin(stream_url, src)
-
-                h = fr.get("height")
-                allow = fr.get("allowfullscreen")
-
-                # print("→ Candidate iframe:", full)
-
-                # YOUTUBE by old logic
-                if h == "480" or allow == "true":
-                    iframe_src = full
-                    # print("   ✔ Valid YOUTUBE (height=480 / allowfullscreen)")
-                    break
-
-                # Modern youtube detection
-                if "youtube.com/embed" in full.lower():
-                    iframe_src = full
-                    # print("   ✔ Valid YOUTUBE (embed)")
-                    break
-
-                # EMB logic
-                if "emb" in full.lower():
-                    iframe_src = full
-                    # print("   ✔ Valid EMB")
-                    break
-
-            # ============================================================
-            # 2) Script-based URL (old logic)
-            # ============================================================
-            if not iframe_src:
-                for script in soup2.find_all("script"):
-                    content = script.string or ""
-                    m = re.search(r'(https?://[^"\']+embed[^"\']+)', content)
-                    if m:
-                        iframe_src = m.group(1)
-                        # print("   ✔ Found embed in script")
-                        break
-
-
-            # ============================================================
-            # 3) If still nothing, use Playwright
-            # ============================================================
-            if not iframe_src:
-                # print(f"⚠ Playwright scanning: {stream_url}")
-
-                with sync_playwright() as p:
-                    browser = p.chromium.launch(headless=True)
-                    page = browser.new_page()
-
-                    try:
-                        page.goto(stream_url, wait_until="domcontentloaded", timeout=15000)
-                        page.wait_for_timeout(1100)
-
-                        iframes = page.query_selector_all("iframe")
-                        # print("🔍 Playwright found:", len(iframes), "iframes")
-
-                        for fr in iframes:
-                            src = fr.get_attribute("src")
-                            if not src:
-                                continue
-
-                            full = urljoin(stream_url, src)
-                            # print("→ PW Candidate:", full)
-
-                            # EMB
-                            if "emb" in full.lower():
-                                iframe_src = full
-                                # print("   ✔ EMB (PW)")
-                                break
-
-                            # Youtube embed
-                            if "youtube.com/embed" in full.lower():
-                                iframe_src = full
-                                # print("   ✔ YouTube (PW)")
-                                break
-
-                        if not iframe_src:
-                            # Last fallback: script embed
-                            m = re.search(r'(https?://[^"\']+embed[^"\']+)', page.content())
-                            if m:
-                                iframe_src = m.group(1)
-                                # print("   ✔ Script embed fallback (PW)")
-
-                    except Exception as e:
-                        print("[PW ERROR]", e)
-
-                    browser.close()
-
+                with span("webplayer", "stream", url=stream_url):
+                    iframe_src = flights.do(stream_url, lambda: self._resolve_webplayer(stream_url))
+            except Exception:
+                iframe_src = None
+            progress.advance(STREAMS)
 
             # ============================================================
             # If still nothing: ignore stream
@@ -245,6 +268,67 @@ class LiveTVProvider(BaseProvider):
         )
 
 
+    # ============================================================
+    # WEBPLAYER: estrategias ordenadas según el historial de cada host
+    # ============================================================
+    def _resolve_webplayer(self, stream_url: str) -> str | None:
+        key = strategy_key(stream_url)
+        static = None
+
+        strategies = STRATEGIES if self.settings.playwright else [s for s in STRATEGIES if s != "playwright"]
+        for strategy in strategy_memory.order(key, strategies):
+            if current_token().cancelled:
+                return None
+            if strategy == "playwright":
+                iframe_src = self._from_playwright(stream_url)
+            else:
+                # Las estrategias estáticas comparten una petición y un parseo
+                if static is None:
+                    try:
+                        r2 = net.get(stream_url, headers=self.settings.headers,
+                                     timeout=self.settings.timeout, verify=False, hedge=True)
+                        r2.raise_for_status()
+                    except:
+                        return None
+                    static = parse_pool.run(parse_webplayer, r2.text, stream_url)
+
+                iframe_src = static.get(strategy)
+
+            if not iframe_src and current_token().cancelled:
+                # Un intento cancelado no dice nada de la estrategia
+                return None
+            strategy_memory.record(key, strategy, bool(iframe_src))
+            if iframe_src:
+                return iframe_src
+
+        return None
+
+    @staticmethod
+    def _from_playwright(stream_url: str) -> str | None:
+        # ============================================================
+        # 3) Playwright (navegador asíncrono compartido)
+        # ============================================================
+        result = browser_resolver.render(stream_url, wait_selector=PW_IFRAME_SELECTOR)
+        if not result:
+            return None
+
+        for full in result.iframes:
+            # EMB
+            if "emb" in full.lower():
+                return full
+
+            # Youtube embed
+            if "youtube.com/embed" in full.lower():
+                return full
+
+        # Last fallback: script embed
+        m = EMBED_RE.search(result.html)
+        if m:
+            return m.group(1)
+
+        return None
+
+
 # DEBUG
 if __name__ == "__main__":
     scraper = LiveTVProvider()
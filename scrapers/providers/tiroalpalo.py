@@ -2,70 +2,91 @@ from __future__ import annotations
 import re
 from datetime import datetime, timedelta
 from typing import List, Optional
-import requests
+from urllib.parse import urljoin, urlsplit
 from bs4 import BeautifulSoup
 
 from ..base import BaseProvider
+from ..config import ProviderSettings
+from .. import net
+from ..cancel import current_token
+from ..dns import dns_cache
 from ..models import Event, Stream
+from ..progress import LISTING, PAGES, progress
+from ..tracing import span
 from .utils.logos import get_team_logo  # NUEVO
 
 class TiroalpaloProvider(BaseProvider):
     name = "Tiroalpalo"
-    LIST_URL = "https://tiroalpalome.com/directo"
+    defaults = ProviderSettings(
+        url="https://tiroalpalome.com/directo",
+        timeout=15,
+        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    )
 
     def fetch_events(self) -> List[Event]:
         events = []
+        progress.begin(LISTING)
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            }
-            html = requests.get(self.LIST_URL, timeout=15, headers=headers).text
-        except Exception as e:
-            print(f"[Tiroalpalo] Error descargando lista: {e}")
-            return events
+            try:
+                html = net.get(self.settings.url, timeout=self.settings.timeout,
+                               headers=self.settings.headers).text
+            except Exception as e:
+                print(f"[Tiroalpalo] Error descargando lista: {e}")
+                return events
 
-        soup = BeautifulSoup(html, "html.parser")
+            soup = BeautifulSoup(html, "html.parser")
 
-        links = []
-        for a in soup.find_all("a", href=True):
-            href = a["href"]
-            text = a.get_text(strip=True)
-            if not href.startswith("http"):
-                if href.startswith("/"):
-                    href = f"https://tiroalpalome.com{href}"
-                else:
-                    href = f"https://tiroalpalome.com/{href}"
+            # Enlaces del propio sitio, resueltos contra la URL configurada
+            host = urlsplit(self.settings.url).netloc
+            links = []
+            for a in soup.find_all("a", href=True):
+                href = urljoin(self.settings.url, a["href"])
+                text = a.get_text(strip=True)
+
+                if host in href and ("-" in text or " vs " in text.lower()):
+                    links.append((href, text))
 
-            if "tiroalpalome.com" in href and ("-" in text or " vs " in text.lower()):
-                links.append((href, text))
+            dns_cache.prefetch(href for href, _ in links)
+        finally:
+            progress.finish(LISTING)
+        progress.begin(PAGES, total=len({href for href, _ in links}))
 
+        token = current_token()
         seen = set()
-        for href, text in links:
+        for i, (href, text) in enumerate(links):
+            if token.cancelled:
+                pendientes = len({h for h, _ in links[i:]} - seen)
+                token.note_unfinished(f"{self.name}: {pendientes} páginas sin revisar")
+                break
             if href in seen:
                 continue
             seen.add(href)
 
             try:
-                event = self._parse_event_page(href, text)
+                with span(text, "event", url=href):
+                    event = self._parse_event_page(href, text)
                 if event:
                     events.append(event)
             except Exception as e:
                 print(f"[Tiroalpalo] Error parseando {href}: {e}")
                 continue
+            finally:
+                progress.advance(PAGES)
 
         return events
 
     def _parse_event_page(self, url: str, fallback: str) -> Optional[Event]:
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            }
-            html = requests.get(url, timeout=15, headers=headers).text
+            html = net.get(url, timeout=self.settings.timeout, headers=self.settings.headers).text
         except Exception as e:
             print(f"[Tiroalpalo] Error descargando página: {e}")
             return None
 
         soup = BeautifulSoup(html, "html.parser")
+        dns_cache.prefetch(
+            fr["src"] for fr in soup.find_all("iframe", src=True)
+            if fr["src"].startswith("http")
+        )
         title_tag = soup.find(["h1", "h2", "h3"])
         title = title_tag.get_text(strip=True) if title_tag else fallback
 
@@ -0,0 +1,27 @@
+"""Compila football_logos.json en el índice binario football_logos.bin.
+
+Ejecutar cada vez que cambie el JSON (el runtime detecta un binario viejo
+y vuelve a compilar en memoria, pero eso cuesta tiempo de arranque):
+
+    python -m scrapers.providers.utils.build_logos
+"""
+import json
+import os
+
+from .logos import LOGOS_BIN, LOGOS_JSON, compile_logos, json_digest
+
+
+def build(src: str = LOGOS_JSON, dst: str = LOGOS_BIN) -> int:
+    with open(src, "rb") as f:
+        raw = f.read()
+    data = compile_logos(json.loads(raw.decode("utf-8")), json_digest(raw), len(raw))
+    tmp = dst + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, dst)
+    return len(data)
+
+
+if __name__ == "__main__":
+    size = build()
+    print(f"✔ {os.path.basename(LOGOS_BIN)}: {size / 1024:.1f} KB")
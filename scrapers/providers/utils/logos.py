@@ -1,19 +1,20 @@
 import os
 import json
+import hashlib
+import mmap
 import re
+import struct
+import sys
+import threading
 import unicodedata
+from array import array
 
-# Ruta al archivo JSON con logos
+from ...metrics import LOGO_LOOKUPS
+
+# Rutas al JSON de origen y al índice precompilado
 CURRENT_DIR = os.path.dirname(__file__)
 LOGOS_JSON = os.path.join(CURRENT_DIR, "football_logos.json")
-
-# Cargar el archivo JSON
-try:
-    with open(LOGOS_JSON, "r", encoding="utf-8") as f:
-        logos_data = json.load(f)
-except Exception as e:
-    print(f"❌ Error cargando football_logos.json: {e}")
-    logos_data = []
+LOGOS_BIN = os.path.join(CURRENT_DIR, "football_logos.bin")
 
 # ------------------------------
 # Normalización y utilidades
@@ -33,21 +34,168 @@ def tokenize(text: str) -> set:
     return set(normalize(text).split())
 
 # ------------------------------
-# Búsqueda por coincidencia
+# Índice binario
 # ------------------------------
+# Cabecera + 7 secciones alineadas a 4 bytes:
+#   0 url_blob      URLs únicas (UTF-8) concatenadas
+#   1 url_offsets   uint32[n_urls + 1]
+#   2 entry_url     uint32[n_entries]  -> índice de URL de cada logo
+#   3 tok_blob      tokens normalizados (UTF-8) concatenados, ordenados
+#   4 tok_offsets   uint32[n_tokens + 1]
+#   5 post_offsets  uint32[n_tokens + 1]
+#   6 postings      uint32[...]        -> logos que contienen cada token
+MAGIC = b"PLGO"
+FORMAT_VERSION = 1
+SECTIONS = 7
+HEADER = struct.Struct("<4sHB x20sI" + "II" * SECTIONS)
+LITTLE = 1 if sys.byteorder == "little" else 0
+
+
+def json_digest(raw: bytes) -> bytes:
+    return hashlib.sha1(raw).digest()
+
+
+def _u32(values) -> bytes:
+    return array("I", values).tobytes()
+
+
+def compile_logos(entries: list, digest: bytes = b"\0" * 20, source_size: int = 0) -> bytes:
+    urls = {}
+    entry_url = []
+    entry_tokens = []
+    for entry in entries:
+        url = entry.get("img_url") or ""
+        entry_url.append(urls.setdefault(url, len(urls)))
+        entry_tokens.append(tokenize(entry.get("name") or ""))
+
+    vocab = sorted(set().union(*entry_tokens)) if entry_tokens else []
+    token_id = {t: i for i, t in enumerate(vocab)}
+    postings = [[] for _ in vocab]
+    for idx, tokens in enumerate(entry_tokens):
+        for t in tokens:
+            postings[token_id[t]].append(idx)
+
+    def blob(strings):
+        data, offsets = bytearray(), [0]
+        for s in strings:
+            data += s.encode("utf-8")
+            offsets.append(len(data))
+        return bytes(data), _u32(offsets)
+
+    url_blob, url_offsets = blob(urls)
+    tok_blob, tok_offsets = blob(vocab)
+    post_offsets, flat = [0], []
+    for plist in postings:
+        flat.extend(plist)
+        post_offsets.append(len(flat))
+
+    sections = [url_blob, url_offsets, _u32(entry_url), tok_blob, tok_offsets, _u32(post_offsets), _u32(flat)]
+
+    body, table, offset = bytearray(), [], HEADER.size
+    for data in sections:
+        pad = (-offset) % 4
+        body += b"\0" * pad
+        offset += pad
+        table += [offset, len(data)]
+        body += data
+        offset += len(data)
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, LITTLE, digest, source_size, *table)
+    return header + bytes(body)
 
-def get_team_logo(name: str) -> str | None:
-    input_tokens = tokenize(name)
-    best_score = 0
-    best_logo = None
 
-    for entry in logos_data:
-        logo_tokens = tokenize(entry["name"])
-        common = input_tokens & logo_tokens
-        score = len(common)
+class LogoIndex:
+    # Lee el índice sin copiarlo: las secciones numéricas son vistas uint32
+    # sobre el buffer (bytes o mmap); solo el vocabulario se decodifica
+    def __init__(self, buffer):
+        self._buffer = buffer
+        view = memoryview(buffer)
+        magic, version, little, digest, source_size, *table = HEADER.unpack_from(view, 0)
+        if magic != MAGIC or version != FORMAT_VERSION or little != LITTLE:
+            raise ValueError("formato de índice de logos no compatible")
+        self.digest = digest
+        self.source_size = source_size
 
-        if score > best_score:
-            best_score = score
-            best_logo = entry["img_url"]
+        parts = [view[table[2 * i]:table[2 * i] + table[2 * i + 1]] for i in range(SECTIONS)]
+        self._url_blob = parts[0]
+        self._url_offsets = parts[1].cast("I")
+        self._entry_url = parts[2].cast("I")
+        tok_blob, tok_offsets = bytes(parts[3]), parts[4].cast("I")
+        self._post_offsets = parts[5].cast("I")
+        self._postings = parts[6].cast("I")
 
-    return best_logo
\ No newline at end of file
+        self._token_id = {
+            tok_blob[tok_offsets[i]:tok_offsets[i + 1]].decode("utf-8"): i
+            for i in range(len(tok_offsets) - 1)
+        }
+
+    def __len__(self) -> int:
+        return len(self._entry_url)
+
+    def url(self, entry: int) -> str:
+        u = self._entry_url[entry]
+        return bytes(self._url_blob[self._url_offsets[u]:self._url_offsets[u + 1]]).decode("utf-8")
+
+    def lookup(self, name: str) -> str | None:
+        # Mayor cantidad de tokens en común; en empate gana el primer logo del JSON
+        scores = {}
+        for token in tokenize(name):
+            tid = self._token_id.get(token)
+            if tid is None:
+                continue
+            for entry in self._postings[self._post_offsets[tid]:self._post_offsets[tid + 1]]:
+                scores[entry] = scores.get(entry, 0) + 1
+        if not scores:
+            return None
+        best = min(scores, key=lambda e: (-scores[e], e))
+        return self.url(best) or None
+
+
+def _open_bin(path: str, raw_json: bytes | None):
+    # None si el binario no existe, está corrupto o quedó viejo respecto del JSON
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        index = LogoIndex(buffer)
+    except Exception:
+        return None
+    if raw_json is not None and (index.digest != json_digest(raw_json) or index.source_size != len(raw_json)):
+        return None
+    return index
+
+
+# El índice se carga la primera vez que se busca un logo, no al importar
+_index = None
+_index_lock = threading.Lock()
+
+def load_logos() -> LogoIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                raw = None
+                if os.path.exists(LOGOS_JSON):
+                    with open(LOGOS_JSON, "rb") as f:
+                        raw = f.read()
+
+                index = _open_bin(LOGOS_BIN, raw)
+                if index is None:
+                    # Sin binario válido: se compila en memoria desde el JSON
+                    try:
+                        index = LogoIndex(compile_logos(json.loads(raw.decode("utf-8")) if raw else []))
+                    except Exception as e:
+                        print(f"❌ Error cargando football_logos.json: {e}")
+                        index = LogoIndex(compile_logos([]))
+                _index = index
+    return _index
+
+# ------------------------------
+# Búsqueda por coincidencia
+# ------------------------------
+
+def get_team_logo(name: str) -> str | None:
+    url = load_logos().lookup(name)
+    LOGO_LOOKUPS.inc(result="found" if url else "missing")
+    return url
@@ -0,0 +1,279 @@
+from __future__ import annotations
+import concurrent.futures
+import datetime
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict
+from typing import Any, Callable, Dict, List, Optional
+
+from .cancel import CancelToken
+from .config import setting
+from .metrics import PUBLISH, PUBLISH_BYTES, PUBLISH_SECONDS
+from .models import Event
+from .net import backoff_delay, get_session
+from .tracing import span
+
+# Destinos de publicación. Cada ejecución se envía a la vez a todos los
+# destinos configurados, cada uno con su tiempo máximo y sus reintentos:
+# un Firebase lento no retrasa el feed del servidor ni el fichero local.
+# Cada destino tiene su propia cola de un hilo: las publicaciones llegan en
+# orden y, si se acumulan, solo se envía la más reciente.
+#
+#   PLOOSTREAM_FIREBASE_URL=...              otra base de datos
+#   PLOOSTREAM_PUBLISH_FILE=eventos.ndjson   copia local (.json o .ndjson)
+#   PLOOSTREAM_PUBLISH_TIMEOUT=30            segundos por intento
+#   PLOOSTREAM_PUBLISH_RETRIES=2
+
+FIREBASE_URL = setting("FIREBASE_URL", "https://ploostream-db-default-rtdb.firebaseio.com/content.json")
+PUBLISH_FILE = setting("PUBLISH_FILE", "")
+PUBLISH_TIMEOUT = setting("PUBLISH_TIMEOUT", 30.0)
+PUBLISH_RETRIES = setting("PUBLISH_RETRIES", 2)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_queues: Dict[str, "_SinkQueue"] = {}
+_latest: Dict[str, int] = {}
+_queues_lock = threading.Lock()
+_sequence = itertools.count(1)
+
+
+def deep_clean(obj):
+    if isinstance(obj, dict):
+        return {str(k): deep_clean(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [deep_clean(i) for i in obj]
+    elif isinstance(obj, (int, float, str, bool)):
+        return obj
+    elif obj is None:
+        return ""
+    elif isinstance(obj, datetime.datetime):
+        return obj.isoformat()
+    return str(obj)
+
+
+def to_payload(events: List[Event]) -> list:
+    data = deep_clean([asdict(e) for e in events])
+    json.dumps(data)
+    return data
+
+
+class PublishError(Exception):
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+# ============================================================
+# Destinos
+# ============================================================
+class Sink(ABC):
+    name = "sink"
+    label = "destino"
+
+    def __init__(self, timeout: float = PUBLISH_TIMEOUT, retries: int = PUBLISH_RETRIES):
+        self.timeout = timeout
+        self.retries = retries
+
+    @property
+    def key(self) -> str:
+        # Identifica el destino real: dos Publisher que escriben en el mismo
+        # sitio (ejecución manual + automática) comparten cola
+        return f"{self.name}:{self.label}"
+
+    @property
+    def deadline(self) -> float:
+        # Tiempo total del destino, con todos sus intentos
+        return self.timeout * (self.retries + 1)
+
+    @abstractmethod
+    def send(self, events: List[Event], payload: list, token: CancelToken) -> int:
+        # Devuelve los bytes enviados; lanza una excepción si falla
+        pass
+
+
+class FirebaseSink(Sink):
+    name = "firebase"
+    label = "Firebase"
+
+    def __init__(self, url: str = FIREBASE_URL, **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+
+    @property
+    def key(self) -> str:
+        return f"firebase:{self.url}"
+
+    def send(self, events, payload, token):
+        body = json.dumps(payload).encode("utf-8")
+        response = get_session().put(self.url, data=body, headers={"Content-Type": "application/json"},
+                                     timeout=token.timeout(self.timeout))
+        response.close()
+        if response.status_code not in (200, 201):
+            raise PublishError(f"Error HTTP: {response.status_code}",
+                               retryable=response.status_code in RETRY_STATUSES)
+        return len(body)
+
+
+class FileSink(Sink):
+    name = "file"
+
+    def __init__(self, path: str, ndjson: Optional[bool] = None, **kwargs):
+        kwargs.setdefault("retries", 0)
+        super().__init__(**kwargs)
+        self.path = path
+        # NDJSON: un evento por línea, cómodo para procesar en streaming
+        self.ndjson = path.endswith((".ndjson", ".jsonl")) if ndjson is None else ndjson
+        self.label = os.path.basename(path)
+
+    @property
+    def key(self) -> str:
+        return f"file:{os.path.abspath(self.path)}"
+
+    def send(self, events, payload, token):
+        if self.ndjson:
+            text = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in payload)
+        else:
+            text = json.dumps(payload, ensure_ascii=False)
+        data = text.encode("utf-8")
+
+        # Escritura atómica: quien lea el fichero nunca ve una copia a medias
+        tmp = self.path + ".tmp"
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+        return len(data)
+
+
+class FeedSink(Sink):
+    # Snapshot y feed de cambios del servidor en proceso (server.ChangeFeed)
+    name = "feed"
+    label = "feed del servidor"
+
+    def __init__(self, feed, **kwargs):
+        kwargs.setdefault("retries", 0)
+        super().__init__(**kwargs)
+        self.feed = feed
+
+    @property
+    def key(self) -> str:
+        return f"feed:{id(self.feed)}"
+
+    def send(self, events, payload, token):
+        self.feed.update(events)
+        return 0
+
+
+# ============================================================
+# Reparto a todos los destinos
+# ============================================================
+class _SinkQueue:
+    # Cola de un hilo por destino. El hilo es daemon: al cerrar la aplicación
+    # (o al reiniciarse para actualizar) no se espera a un PUT en vuelo.
+    def __init__(self, name: str):
+        self._jobs: queue.SimpleQueue = queue.SimpleQueue()
+        threading.Thread(target=self._run, name=f"publish-{name}", daemon=True).start()
+
+    def submit(self, fn: Callable[..., Any], *args) -> concurrent.futures.Future:
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        self._jobs.put((future, fn, args))
+        return future
+
+    def _run(self):
+        while True:
+            future, fn, args = self._jobs.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+
+def _queue(sink: Sink, seq: int) -> _SinkQueue:
+    with _queues_lock:
+        _latest[sink.key] = max(_latest.get(sink.key, 0), seq)
+        sink_queue = _queues.get(sink.key)
+        if sink_queue is None:
+            sink_queue = _queues[sink.key] = _SinkQueue(sink.name)
+        return sink_queue
+
+
+def _superseded(sink: Sink, seq: int) -> bool:
+    with _queues_lock:
+        return _latest.get(sink.key, 0) > seq
+
+
+class Publisher:
+    def __init__(self, sinks: List[Sink], log: Callable[[str], None] = print):
+        self.sinks = list(sinks)
+        self.log = log
+
+    def publish(self, events: List[Event], wait: bool = True) -> Dict[str, Optional[bool]]:
+        # Con wait=True espera a todos los destinos (cada uno acotado por su
+        # deadline) y devuelve el resultado de cada uno: True enviada, False
+        # error, None sustituida por una publicación más reciente antes de
+        # salir. Con wait=False vuelve enseguida y los destinos terminan en
+        # sus colas.
+        if not self.sinks:
+            return {}
+        payload = to_payload(events)
+        seq = next(_sequence)
+        self.log(f"⏳ Enviando datos a {', '.join(s.label for s in self.sinks)} ...")
+        futures = {_queue(sink, seq).submit(self._deliver, sink, seq, events, payload): sink
+                   for sink in self.sinks}
+        if not wait:
+            return {}
+        return {futures[f].name: f.result() for f in concurrent.futures.as_completed(futures)}
+
+    def _deliver(self, sink: Sink, seq: int, events: List[Event], payload: list) -> Optional[bool]:
+        if _superseded(sink, seq):
+            # Ya hay una publicación más reciente en cola para este destino
+            PUBLISH.inc(sink=sink.name, result="skipped")
+            self.log(f"· {sink.label}: sustituida por una publicación más reciente")
+            return None
+
+        token = CancelToken.with_timeout(sink.deadline)
+        attempt = 0
+        with span(f"publicar {sink.name}", "publish", eventos=len(events)) as args:
+            while True:
+                inicio = time.monotonic()
+                try:
+                    size = sink.send(events, payload, token)
+                except Exception as e:
+                    PUBLISH_SECONDS.observe(time.monotonic() - inicio, sink=sink.name)
+                    retryable = getattr(e, "retryable", True)
+                    if (attempt < sink.retries and retryable and not token.cancelled
+                            and not _superseded(sink, seq) and token.sleep(backoff_delay(attempt))):
+                        PUBLISH.inc(sink=sink.name, result="retry")
+                        attempt += 1
+                        continue
+                    PUBLISH.inc(sink=sink.name, result="error")
+                    args.update(error=str(e), intentos=attempt + 1)
+                    self.log(f"❌ {sink.label}: {e}")
+                    return False
+
+                PUBLISH_SECONDS.observe(time.monotonic() - inicio, sink=sink.name)
+                PUBLISH.inc(sink=sink.name, result="ok")
+                if size:
+                    PUBLISH_BYTES.inc(size, sink=sink.name)
+                args.update(bytes=size, intentos=attempt + 1)
+                self.log(f"✅ Datos enviados correctamente a {sink.label}.")
+                return True
+
+
+def build_publisher(log: Callable[[str], None] = print, firebase: bool = True,
+                    output: Optional[str] = None, feed=None) -> Publisher:
+    sinks: List[Sink] = []
+    if feed is not None:
+        sinks.append(FeedSink(feed))
+    output = output or PUBLISH_FILE
+    if output:
+        sinks.append(FileSink(output))
+    if firebase:
+        sinks.append(FirebaseSink())
+    return Publisher(sinks, log)
@@ -1,14 +1,84 @@
-from typing import List
+from __future__ import annotations
+import importlib
+import threading
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+
 from .base import BaseProvider
+from .config import provider_settings
+from .models import Event
+
+
+# Descriptor de proveedor: solo nombre y ruta de import, sin cargar el módulo.
+# Los módulos pesados (playwright, aiohttp, bs4, logos) se importan
+# la primera vez que el proveedor se ejecuta.
+@dataclass(frozen=True)
+class ProviderDescriptor:
+    name: str
+    module: str
+    class_name: str
+    # URLs base que se pueden precalentar (DNS + TLS) sin importar el módulo.
+    # La primera es la del propio proveedor; el resto, CDNs y similares.
+    warm_urls: Tuple[str, ...] = ()
+    verify_tls: bool = True
+
+    def warm_targets(self) -> Tuple[str, ...]:
+        # Con PLOOSTREAM_<PROVEEDOR>_URL se precalienta el host configurado
+        url = provider_settings(self.name).url
+        if not url or not self.warm_urls:
+            return self.warm_urls
+        parts = urlsplit(url)
+        return (f"{parts.scheme}://{parts.netloc}/",) + self.warm_urls[1:]
+
+
+class LazyProvider(BaseProvider):
+    def __init__(self, descriptor: ProviderDescriptor):
+        self.descriptor = descriptor
+        self.name = descriptor.name
+        self._instance: Optional[BaseProvider] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    def load(self) -> BaseProvider:
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    module = importlib.import_module(self.descriptor.module, __package__)
+                    self._instance = getattr(module, self.descriptor.class_name)()
+        return self._instance
+
+    @property
+    def is_async(self) -> bool:
+        return self.load().is_async
+
+    def fetch_events(self) -> List[Event]:
+        # Con un proveedor asíncrono devuelve la corrutina tal cual
+        return self.load().fetch_events()
+
+    def __repr__(self) -> str:
+        estado = "cargado" if self.loaded else "pendiente"
+        return f"<LazyProvider {self.name} ({estado})>"
+
+
+PROVIDERS: List[ProviderDescriptor] = [
+    ProviderDescriptor("Kakarotfoot", ".providers.kakarotfoot", "KakarotfootProvider",
+                       warm_urls=("https://kakarotfoot.ru/",)),
+    ProviderDescriptor("Tiroalpalo", ".providers.tiroalpalo", "TiroalpaloProvider",
+                       warm_urls=("https://tiroalpalome.com/",)),
+    ProviderDescriptor("KevinSport", ".providers.kevinsport", "KevinsportProvider"),
+    ProviderDescriptor("LiveTV", ".providers.livetv", "LiveTVProvider",
+                       warm_urls=("https://livetv.sx/", "https://cdn.livetv869.me/"),
+                       verify_tls=False),
+]
+
+
+def enabled_providers() -> List[ProviderDescriptor]:
+    # PLOOSTREAM_<PROVEEDOR>_ENABLED=0 lo deja fuera sin tocar el código
+    return [d for d in PROVIDERS if provider_settings(d.name).enabled]
+
 
-from .providers.kakarotfoot import KakarotfootProvider
-from .providers.tiroalpalo import TiroalpaloProvider
-from .providers.kevinsport import KevinsportProvider
-from .providers.livetv import LiveTVProvider
-
-provider_registry: List[BaseProvider] = [
-    KakarotfootProvider(),
-    TiroalpaloProvider(),
-    KevinsportProvider(),
-    LiveTVProvider(),
-]
\ No newline at end of file
+provider_registry: List[BaseProvider] = [LazyProvider(d) for d in enabled_providers()]
@@ -0,0 +1,164 @@
+from __future__ import annotations
+import concurrent.futures
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from .base import BaseProvider
+from .cancel import CancelToken
+from .models import Event
+from .service import ScraperService
+from .snapshot import EventDiff, Snapshot
+
+
+@dataclass(frozen=True)
+class ProviderSchedule:
+    interval: float             # segundos entre refrescos
+    jitter: float = 0.1         # variación aleatoria (fracción del intervalo)
+    cost_budget: float = 600    # segundos de trabajo permitidos por hora
+    deadline: float = 300       # tiempo máximo de una ejecución
+
+
+DEFAULT_SCHEDULE = ProviderSchedule(interval=900)
+
+# Kakarotfoot es un JSON barato; LiveTV puede necesitar Playwright
+DEFAULT_SCHEDULES: Dict[str, ProviderSchedule] = {
+    "Kakarotfoot": ProviderSchedule(interval=60, jitter=0.2, cost_budget=600, deadline=30),
+    "KevinSport": ProviderSchedule(interval=300, jitter=0.15, cost_budget=300, deadline=120),
+    "Tiroalpalo": ProviderSchedule(interval=600, jitter=0.15, cost_budget=300, deadline=180),
+    "LiveTV": ProviderSchedule(interval=1800, jitter=0.1, cost_budget=300, deadline=600),
+}
+
+PublishCallback = Callable[[List[Event], EventDiff], None]
+
+
+class RefreshScheduler:
+    def __init__(
+        self,
+        service: ScraperService,
+        snapshot: Snapshot,
+        on_publish: PublishCallback,
+        schedules: Optional[Dict[str, ProviderSchedule]] = None,
+        max_interval: Optional[float] = None,
+        log: Callable[[str], None] = print,
+    ):
+        self.service = service
+        self.snapshot = snapshot
+        self.on_publish = on_publish
+        self.schedules = DEFAULT_SCHEDULES if schedules is None else schedules
+        self.max_interval = max_interval
+        self.log = log
+
+        self._next_run: Dict[str, float] = {}
+        self._running: set = set()
+        self._tokens: Dict[str, CancelToken] = {}
+        self._state_lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and not self._stop.is_set()
+
+    def schedule_for(self, name: str) -> ProviderSchedule:
+        return self.schedules.get(name, DEFAULT_SCHEDULE)
+
+    def next_delay(self, name: str, duration: float) -> float:
+        s = self.schedule_for(name)
+        interval = s.interval
+        if self.max_interval is not None:
+            interval = min(interval, self.max_interval)
+        # Si la última ejecución fue cara, se espacia para no pasar del presupuesto
+        if s.cost_budget > 0:
+            interval = max(interval, duration * 3600 / s.cost_budget)
+        return interval * (1 + random.uniform(-s.jitter, s.jitter))
+
+    def start(self):
+        if self.running:
+            return
+        # Cada arranque tiene su propio evento de parada para que un bucle
+        # anterior que aún está terminando no se reactive
+        self._stop = threading.Event()
+        now = time.monotonic()
+        with self._state_lock:
+            for p in self.service.providers:
+                self._next_run.setdefault(p.name, now)
+        self._thread = threading.Thread(target=self._loop, args=(self._stop,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        with self._state_lock:
+            for token in self._tokens.values():
+                token.cancel("modo automático detenido")
+
+    def _loop(self, stop: threading.Event):
+        providers: List[BaseProvider] = list(self.service.providers)
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(providers)))
+        try:
+            while not stop.is_set():
+                now = time.monotonic()
+                pending = []
+                with self._state_lock:
+                    for p in providers:
+                        if p.name in self._running:
+                            continue
+                        due = self._next_run.get(p.name, now)
+                        if due <= now:
+                            self._running.add(p.name)
+                            pool.submit(self._run_provider, p, stop)
+                        else:
+                            pending.append(due)
+
+                wait = min(pending) - now if pending else 5
+                # Se despierta antes si un proveedor termina o se detiene el modo automático
+                self._wake.wait(timeout=min(max(wait, 0.5), 5))
+                self._wake.clear()
+        finally:
+            pool.shutdown(wait=False)
+
+    def _run_provider(self, provider: BaseProvider, stop: threading.Event):
+        token = CancelToken.with_timeout(self.schedule_for(provider.name).deadline)
+        with self._state_lock:
+            self._tokens[provider.name] = token
+
+        inicio = time.monotonic()
+        try:
+            events = self.service.fetch_provider(provider, token)
+        except Exception as e:
+            self.log(f"❌ {provider.name}: {e}")
+            events = None
+        duration = time.monotonic() - inicio
+
+        with self._state_lock:
+            self._next_run[provider.name] = time.monotonic() + self.next_delay(provider.name, duration)
+            self._running.discard(provider.name)
+            self._tokens.pop(provider.name, None)
+        self._wake.set()
+
+        for pendiente in token.unfinished:
+            self.log(f"⌛ {pendiente}")
+
+        if events is None or stop.is_set():
+            return
+        if not events and provider.name in self.snapshot.providers():
+            # Los proveedores devuelven [] ante errores: se conserva lo anterior
+            self.log(f"⚠ {provider.name}: sin resultados, se conserva el snapshot ({duration:.1f}s)")
+            return
+
+        with self._publish_lock:
+            diff = self.snapshot.merge(provider.name, events, partial=bool(token.unfinished))
+            if not diff.changed:
+                self.log(f"· {provider.name}: sin cambios ({duration:.1f}s)")
+                return
+            self.log(f"🔸 {provider.name}: {diff.summary()} ({duration:.1f}s)")
+            self.snapshot.persist()
+            try:
+                self.on_publish(self.snapshot.events(), diff)
+            except Exception as e:
+                self.log(f"❌ Error publicando: {e}")
@@ -0,0 +1,264 @@
+from __future__ import annotations
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from typing import Deque, List, Optional, Tuple, Union
+
+from . import aio
+from .metrics import metrics
+from .models import Event
+from .progress import ProgressBus, progress
+from .publish import to_payload
+from .snapshot import diff_events, event_key, stream_signature
+
+BACKLOG = 2000          # mensajes guardados para reanudar con Last-Event-ID
+HEARTBEAT_SECONDS = 15  # comentario periódico para mantener viva la conexión
+RETRY_MS = 3000
+PROGRESS_INTERVAL = 0.5  # como mucho dos mensajes de progreso por segundo
+
+
+# Aviso para los clientes en espera: se activa desde cualquier hilo y solo
+# despierta asyncio.Event dentro del event loop compartido.
+class _Signal:
+    def __init__(self):
+        self._event: Optional[asyncio.Event] = None
+
+    def notify(self):
+        aio.get_loop().call_soon_threadsafe(self._wake)
+
+    def _wake(self):
+        if self._event is not None:
+            self._event.set()
+        self._event = asyncio.Event()
+
+    async def wait(self, timeout: float) -> bool:
+        if self._event is None:
+            self._event = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+def _key_dict(event: Event) -> dict:
+    event_id, league = event_key(event)
+    return {"id": event_id, "league": league}
+
+
+def _frame(msg_id: Union[int, str], kind: str, data) -> bytes:
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {msg_id}\nevent: {kind}\ndata: {payload}\n\n".encode("utf-8")
+
+
+# Feed de cambios: compara cada lista publicada con la anterior y guarda los
+# mensajes ya serializados. Todos los clientes comparten los mismos bytes, y
+# los clientes inactivos solo esperan un asyncio.Event, sin hilo propio.
+# Los ids llevan la época del proceso ("<época>-<n>"): un cliente que
+# reconecta tras un reinicio del servidor recibe el estado completo.
+class ChangeFeed:
+    def __init__(self, backlog: int = BACKLOG):
+        self.epoch = f"{time.time_ns() // 1_000_000:x}"
+        self._events: List[Event] = []
+        self._messages: Deque[Tuple[int, bytes]] = deque(maxlen=backlog)
+        self._last_id = 0
+        self._lock = threading.Lock()
+        self._changed = _Signal()
+        self._snapshot_frame: Tuple[int, bytes] = (-1, b"")
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def event_id(self, n: int) -> str:
+        return f"{self.epoch}-{n}"
+
+    def parse_id(self, raw: Optional[str]) -> Optional[int]:
+        # None si falta, no se entiende o es de otra ejecución del servidor
+        if not raw:
+            return None
+        epoch, _, n = raw.partition("-")
+        if epoch != self.epoch or not n.isdigit():
+            return None
+        return int(n)
+
+    def events(self) -> List[Event]:
+        with self._lock:
+            return list(self._events)
+
+    def update(self, events: List[Event]) -> int:
+        # Se puede llamar desde cualquier hilo; devuelve cuántos mensajes generó
+        with self._lock:
+            diff = diff_events(self._events, events)
+            before = {event_key(e): e for e in self._events}
+            messages = []
+
+            for e in diff.added:
+                messages.append(("event.add", {"key": _key_dict(e), "event": to_payload([e])[0]}))
+
+            for e in diff.updated:
+                messages.extend(self._event_changes(before[event_key(e)], e))
+
+            for e in diff.removed:
+                messages.append(("event.remove", {"key": _key_dict(e)}))
+
+            for kind, data in messages:
+                self._last_id += 1
+                self._messages.append((self._last_id, _frame(self.event_id(self._last_id), kind, data)))
+            self._events = list(events)
+
+        if messages:
+            self._changed.notify()
+        return len(messages)
+
+    def _event_changes(self, old: Event, new: Event) -> List[Tuple[str, dict]]:
+        key = _key_dict(new)
+        changes = []
+
+        old_fields = {k: v for k, v in to_payload([old])[0].items() if k != "streams"}
+        new_fields = {k: v for k, v in to_payload([new])[0].items() if k != "streams"}
+        if old_fields != new_fields:
+            changes.append(("event.update", {"key": key, "event": new_fields}))
+
+        old_streams = {s.url: s for s in old.streams}
+        new_streams = {s.url: s for s in new.streams}
+        for url, s in new_streams.items():
+            if url not in old_streams or stream_signature(old_streams[url]) != stream_signature(s):
+                changes.append(("stream.add", {"key": key, "stream": to_payload([s])[0]}))
+        for url in old_streams:
+            if url not in new_streams:
+                changes.append(("stream.remove", {"key": key, "url": url}))
+        return changes
+
+    def since(self, last_id: int) -> Optional[List[bytes]]:
+        # None si el cliente quedó fuera del historial y necesita el estado completo
+        with self._lock:
+            if last_id > self._last_id:
+                return None
+            if last_id == self._last_id:
+                return []
+            if not self._messages or self._messages[0][0] > last_id + 1:
+                return None
+            return [frame for msg_id, frame in self._messages if msg_id > last_id]
+
+    def snapshot_frame(self) -> Tuple[int, bytes]:
+        with self._lock:
+            if self._snapshot_frame[0] != self._last_id:
+                data = {"events": to_payload(self._events)}
+                self._snapshot_frame = (self._last_id, _frame(self.event_id(self._last_id), "snapshot", data))
+            return self._snapshot_frame
+
+    async def wait(self, timeout: float) -> bool:
+        return await self._changed.wait(timeout)
+
+
+# Progreso de las ejecuciones en curso, suscrito al bus de progreso
+class ProgressFeed:
+    def __init__(self, bus: ProgressBus = progress):
+        self.bus = bus
+        self.version = 0
+        self._changed = _Signal()
+        bus.subscribe(self._on_progress)
+
+    def _on_progress(self, _):
+        self.version += 1
+        self._changed.notify()
+
+    def snapshot(self) -> List[dict]:
+        return self.bus.snapshot()
+
+    async def wait(self, timeout: float) -> bool:
+        return await self._changed.wait(timeout)
+
+
+# ===========================
+#     SERVIDOR HTTP (aiohttp)
+# ===========================
+def create_app(feed: ChangeFeed, progress_feed: Optional[ProgressFeed] = None):
+    from aiohttp import web
+
+    progress_feed = progress_feed or ProgressFeed()
+
+    def _sse_response():
+        return web.StreamResponse(headers={
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        })
+
+    async def events_handler(request):
+        return web.json_response(to_payload(feed.events()), headers={"X-Last-Event-ID": feed.event_id(feed.last_id)})
+
+    async def stream_handler(request):
+        resp = _sse_response()
+        await resp.prepare(request)
+
+        cursor = feed.parse_id(request.headers.get("Last-Event-ID") or request.query.get("last_id"))
+
+        try:
+            await resp.write(f"retry: {RETRY_MS}\n\n".encode())
+            while True:
+                frames = feed.since(cursor) if cursor is not None else None
+                if frames is None:
+                    cursor, frame = feed.snapshot_frame()
+                    await resp.write(frame)
+                elif frames:
+                    await resp.write(b"".join(frames))
+                    cursor += len(frames)
+                elif not await feed.wait(HEARTBEAT_SECONDS):
+                    await resp.write(b": ping\n\n")
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+        return resp
+
+    async def progress_handler(request):
+        return web.json_response(progress_feed.snapshot())
+
+    async def progress_stream_handler(request):
+        resp = _sse_response()
+        await resp.prepare(request)
+        try:
+            await resp.write(f"retry: {RETRY_MS}\n\n".encode())
+            sent = None
+            while True:
+                if progress_feed.version != sent:
+                    sent = progress_feed.version
+                    await resp.write(_frame(sent, "progress", progress_feed.snapshot()))
+                    # Las actualizaciones que lleguen mientras tanto salen juntas
+                    await asyncio.sleep(PROGRESS_INTERVAL)
+                elif not await progress_feed.wait(HEARTBEAT_SECONDS):
+                    await resp.write(b": ping\n\n")
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+        return resp
+
+    async def metrics_handler(request):
+        return web.Response(text=metrics.render(), content_type="text/plain",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    async def health_handler(request):
+        return web.json_response({"ok": True, "events": len(feed.events()), "last_id": feed.event_id(feed.last_id)})
+
+    app = web.Application()
+    app.router.add_get("/events", events_handler)
+    app.router.add_get("/events/stream", stream_handler)
+    app.router.add_get("/progress", progress_handler)
+    app.router.add_get("/progress/stream", progress_stream_handler)
+    app.router.add_get("/metrics", metrics_handler)
+    app.router.add_get("/health", health_handler)
+    return app
+
+
+def start_server(feed: ChangeFeed, host: str = "0.0.0.0", port: int = 8080):
+    # Arranca el servidor en el event loop compartido y devuelve el runner
+    from aiohttp import web
+
+    async def _start():
+        runner = web.AppRunner(create_app(feed))
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+    return aio.run(_start())
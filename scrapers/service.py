@@ -1,28 +1,126 @@
-from typing import List
+import concurrent.futures
+import time
+from collections import Counter
+from typing import Callable, List, Optional
+from . import aio
 from .models import Event
 from .base import BaseProvider
+from .canonical import canonicalize_events
+from .cancel import CancelToken, NEVER
+from .context import provider_scope
+from .coordinator import JOIN, RunCoordinator, run_coordinator
+from .metrics import EVENTS, RUN_SECONDS, RUNS, STREAMS
+from .probe import StreamProber
+from .progress import PROBE, RUN, progress
+from .tracing import span
+
+# Margen sobre la fecha límite para que el proveedor asíncrono cierre sus tareas
+ASYNC_GRACE = 5
+
+
+def dedupe_events(events: List[Event]) -> List[Event]:
+    # eliminar duplicados por id+liga
+    seen = set()
+    unique = []
+    for e in sorted(events, key=lambda x: x.start_time):
+        key = (e.id, e.league)
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(e)
+
+    return unique
+
+
+def record_run_metrics(provider: str, events: List[Event]):
+    EVENTS.set(len(events), provider=provider)
+    STREAMS.clear(provider=provider)
+    for health, count in Counter(s.health or "unknown" for e in events for s in e.streams).items():
+        STREAMS.set(count, provider=provider, health=health)
+
 
 class ScraperService:
-    def __init__(self, providers: List[BaseProvider]):
+    def __init__(self, providers: List[BaseProvider],
+                 coordinator: Optional[RunCoordinator] = None,
+                 log: Optional[Callable[[str], None]] = None,
+                 prober: Optional[StreamProber] = None,
+                 prune_dead: bool = False):
         self.providers = providers
+        self.coordinator = coordinator or run_coordinator
+        self.log = log
+        self.prober = prober
+        self.prune_dead = prune_dead
 
-    def build_events(self) -> List[Event]:
-        events = []
+    def fetch_provider(self, provider: BaseProvider, token: CancelToken = NEVER) -> List[Event]:
+        def on_coalesced(kind: str):
+            if not self.log:
+                return
+            if kind == JOIN:
+                self.log(f"↪ {provider.name}: ya hay una ejecución en curso, se reutiliza su resultado")
+            else:
+                self.log(f"↪ {provider.name}: en cola detrás de la ejecución en curso")
 
-        for p in self.providers:
+        def run() -> List[Event]:
+            progress.reset(provider.name)
+            progress.begin(RUN)
+            inicio = time.monotonic()
+            result = "error"
             try:
-                events.extend(p.fetch_events())
+                with span(provider.name, "provider") as args:
+                    events = self._fetch(provider, token)
+                    args["events"] = len(events)
+                # URLs canónicas y sin repetidos antes de sondear: menos trabajo y menos bytes
+                canonicalize_events(events)
+                if self.prober is not None:
+                    # Sondeo de streams dentro de la ejecución coordinada: quien se
+                    # une a ella recibe los streams ya anotados
+                    progress.begin(PROBE)
+                    with span("sondeo", "probe"):
+                        self.prober.annotate(events, self.prune_dead)
+                    progress.finish(PROBE)
+                # Los proveedores devuelven [] cuando fallan: sin eventos no es "ok"
+                if token.cancelled:
+                    result = "partial"
+                else:
+                    result = "ok" if events else "empty"
+                record_run_metrics(provider.name, events)
+                return events
+            finally:
+                progress.finish(RUN)
+                RUNS.inc(provider=provider.name, result=result)
+                RUN_SECONDS.observe(time.monotonic() - inicio, provider=provider.name)
+
+        with token.activate(), provider_scope(provider.name):
+            return self.coordinator.run(provider.name, run, on_coalesced)
+
+    def _fetch(self, provider: BaseProvider, token: CancelToken) -> List[Event]:
+        if not provider.is_async:
+            return provider.fetch_events()
+
+        # Proveedor asíncrono: corre en el loop compartido, con sus sesiones
+        # y resolvers; este hilo solo espera el resultado
+        async def fetch() -> List[Event]:
+            with token.activate(), provider_scope(provider.name):
+                return await provider.fetch_events()
+
+        remaining = token.remaining()
+        return aio.run(fetch(), timeout=None if remaining is None else remaining + ASYNC_GRACE)
+
+    def build_events(self, token: CancelToken = NEVER) -> List[Event]:
+        # Todos los proveedores a la vez: los síncronos en un pool de hilos,
+        # los asíncronos en el event loop compartido
+        def one(p: BaseProvider) -> List[Event]:
+            if token.cancelled:
+                token.note_unfinished(f"{p.name}: no se ejecutó")
+                return []
+            try:
+                return self.fetch_provider(p, token)
             except Exception:
-                continue
-
-        # eliminar duplicados por id+liga
-        seen = set()
-        unique = []
-        for e in sorted(events, key=lambda x: x.start_time):
-            key = (e.id, e.league)
-            if key in seen:
-                continue
-            seen.add(key)
-            unique.append(e)
-
-        return unique
+                return []
+
+        events = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(self.providers))) as pool:
+            for result in pool.map(one, self.providers):
+                events.extend(result)
+
+        return dedupe_events(events)
@@ -0,0 +1,173 @@
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .models import Event, Stream
+from .paths import data_file
+from .service import dedupe_events
+
+SNAPSHOT_FILE = "snapshot.json"
+SNAPSHOT_MAX_AGE = 1800  # 30 minutos: más viejo no se vuelve a publicar
+
+
+# La latencia cambia en cada sondeo; no cuenta como cambio del evento
+VOLATILE_STREAM_FIELDS = ("latency_ms",)
+
+
+def event_key(event: Event) -> Tuple[str, str]:
+    return (event.id, event.league)
+
+
+def stream_signature(stream: Stream) -> dict:
+    data = stream.to_dict()
+    for name in VOLATILE_STREAM_FIELDS:
+        data.pop(name, None)
+    return data
+
+
+def event_signature(event: Event) -> dict:
+    data = event.to_dict()
+    data["streams"] = [stream_signature(s) for s in event.streams]
+    return data
+
+
+@dataclass
+class EventDiff:
+    added: List[Event] = field(default_factory=list)
+    updated: List[Event] = field(default_factory=list)
+    removed: List[Event] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+    def summary(self) -> str:
+        return f"+{len(self.added)} ~{len(self.updated)} -{len(self.removed)}"
+
+
+def diff_events(old: List[Event], new: List[Event]) -> EventDiff:
+    before = {event_key(e): e for e in old}
+    after = {event_key(e): e for e in new}
+    diff = EventDiff()
+
+    for key, event in after.items():
+        prev = before.get(key)
+        if prev is None:
+            diff.added.append(event)
+        elif event_signature(prev) != event_signature(event):
+            diff.updated.append(event)
+
+    for key, event in before.items():
+        if key not in after:
+            diff.removed.append(event)
+
+    return diff
+
+
+# Estado actual de eventos por proveedor. Cada proveedor reemplaza solo
+# su parte; la lista publicada se recalcula a partir de todas.
+class Snapshot:
+    def __init__(self, store: Optional["SnapshotStore"] = None):
+        self.store = store
+        self.updated_at = 0.0  # time.time() de la última actualización
+        self._by_provider: Dict[str, List[Event]] = {}
+        self._lock = threading.Lock()
+
+    def merge(self, provider: str, events: List[Event], partial: bool = False) -> EventDiff:
+        with self._lock:
+            previous = self._by_provider.get(provider, [])
+            merged = list(events)
+            if partial:
+                # Ejecución cortada por la fecha límite: lo que no se alcanzó a
+                # revisar se conserva en lugar de darse por eliminado
+                fresh = {event_key(e) for e in events}
+                merged += [e for e in previous if event_key(e) not in fresh]
+            diff = diff_events(previous, merged)
+            self._by_provider[provider] = merged
+            self.updated_at = time.time()
+        return diff
+
+    def by_provider(self) -> Dict[str, List[Event]]:
+        with self._lock:
+            return {name: list(items) for name, items in self._by_provider.items()}
+
+    def age(self) -> float:
+        return time.time() - self.updated_at if self.updated_at else float("inf")
+
+    def persist(self):
+        if self.store is not None:
+            self.store.save(self)
+
+    def warm_start(self) -> bool:
+        # Carga el último snapshot guardado; devuelve True si había uno
+        if self.store is None:
+            return False
+        loaded = self.store.load()
+        if loaded is None:
+            return False
+        with self._lock:
+            # Una ejecución en vivo que ya terminó tiene prioridad sobre el disco
+            if self.updated_at:
+                return False
+            self._by_provider, self.updated_at = loaded
+        return True
+
+    def events(self) -> List[Event]:
+        with self._lock:
+            merged = [e for items in self._by_provider.values() for e in items]
+        return dedupe_events(merged)
+
+    def providers(self) -> List[str]:
+        with self._lock:
+            return list(self._by_provider)
+
+
+# Último snapshot bueno en disco, para arrancar con datos tras un reinicio
+class SnapshotStore:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _path(self) -> str:
+        if self.path is None:
+            self.path = data_file(SNAPSHOT_FILE)
+        return self.path
+
+    def save(self, snapshot: Snapshot):
+        payload = {
+            "updated_at": snapshot.updated_at or time.time(),
+            "providers": {
+                name: [e.to_dict() for e in items]
+                for name, items in snapshot.by_provider().items()
+            },
+        }
+        path = self._path()
+        tmp = path + ".tmp"
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(payload, f, ensure_ascii=False)
+                os.replace(tmp, path)
+            except Exception as e:
+                print(f"[Snapshot] Error guardando {path}: {e}")
+
+    def load(self) -> Optional[Tuple[Dict[str, List[Event]], float]]:
+        path = self._path()
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            by_provider = {
+                name: [Event.from_dict(d) for d in items]
+                for name, items in payload.get("providers", {}).items()
+            }
+            return by_provider, float(payload.get("updated_at", 0))
+        except Exception as e:
+            print(f"[Snapshot] Error leyendo {path}: {e}")
+            return None
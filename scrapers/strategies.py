@@ -0,0 +1,96 @@
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from .paths import data_file
+
+HALF_LIFE_SECONDS = 3 * 24 * 3600
+
+
+def strategy_key(url: str) -> str:
+    # Host del reproductor más el tipo (?t=) cuando existe: en LiveTV todos los
+    # webplayers comparten host y lo que cambia es el reproductor embebido
+    parsed = urlparse(url)
+    key = parsed.netloc.lower()
+    kind = parse_qs(parsed.query).get("t")
+    if kind:
+        key += f"/t={kind[0]}"
+    return key
+
+
+# Recuerda qué estrategia de extracción funcionó para cada host y ordena las
+# estrategias por tasa de éxito. Los contadores decaen con el tiempo para que
+# un cambio en el sitio se refleje en unos días.
+class StrategyMemory:
+    def __init__(self, path: Optional[str] = None, half_life: float = HALF_LIFE_SECONDS):
+        self.path = path
+        self.half_life = half_life
+        self._stats: Dict[str, Dict[str, List[float]]] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dirty = False
+
+    def order(self, key: str, strategies: List[str]) -> List[str]:
+        now = time.time()
+        with self._lock:
+            self._load()
+            stats = self._stats.get(key, {})
+            scores = {s: self._score(stats.get(s), now) for s in strategies}
+        # sorted es estable: sin historial se respeta el orden por defecto
+        return sorted(strategies, key=lambda s: -scores[s])
+
+    def record(self, key: str, strategy: str, success: bool):
+        now = time.time()
+        with self._lock:
+            self._load()
+            entry = self._stats.setdefault(key, {}).get(strategy)
+            wins, attempts = self._decayed(entry, now)
+            self._stats[key][strategy] = [wins + (1 if success else 0), attempts + 1, now]
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty or not self.path:
+                return
+            tmp = self.path + ".tmp"
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(self._stats, f)
+                os.replace(tmp, self.path)
+                self._dirty = False
+            except Exception as e:
+                print(f"[Strategies] Error guardando {self.path}: {e}")
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.path is None:
+            self.path = data_file("strategies.json")
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._stats = json.load(f)
+        except Exception as e:
+            print(f"[Strategies] Error leyendo {self.path}: {e}")
+
+    def _decayed(self, entry: Optional[List[float]], now: float):
+        if not entry:
+            return 0.0, 0.0
+        wins, attempts, updated = entry
+        factor = 0.5 ** (max(0.0, now - updated) / self.half_life)
+        return wins * factor, attempts * factor
+
+    def _score(self, entry: Optional[List[float]], now: float) -> float:
+        wins, attempts = self._decayed(entry, now)
+        # Laplace: sin datos vale 0.5
+        return (wins + 1) / (attempts + 2)
+
+
+strategy_memory = StrategyMemory()
@@ -0,0 +1,170 @@
+from __future__ import annotations
+import asyncio
+import contextlib
+import datetime
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .config import setting
+from .context import current_provider
+from .paths import data_file
+
+# Trazas por spans en formato "Trace Event" (chrome://tracing, Perfetto,
+# speedscope). El fichero es un array JSON con un evento por línea y sin
+# cerrar, cosa que el formato admite: si el proceso muere, la traza sigue
+# siendo legible. Cada proveedor es un "proceso" del visor y cada hilo o
+# tarea asyncio una fila, así se ven el camino crítico y los huecos.
+#
+#   PLOOSTREAM_TRACE=1    activa las trazas (carpeta de datos, traces/)
+#   python -m scrapers run --trace run.json
+
+TRACE_ENABLED = setting("TRACE", False)
+
+class Tracer:
+    def __init__(self):
+        self.path: Optional[str] = None
+        self._file = None
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._pids: Dict[str, int] = {}
+        self._lanes: Dict[Any, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self._file is not None
+
+    def start(self, path: Optional[str] = None) -> str:
+        with self._lock:
+            if self._file is not None:
+                return self.path
+            if path is None:
+                stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+                path = data_file(os.path.join("traces", f"trace-{stamp}.json"))
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.path = path
+            self._file = open(path, "w", encoding="utf-8")
+            self._file.write("[\n")
+            self._file.flush()
+            self._origin = time.perf_counter()
+            self._pids.clear()
+            self._lanes.clear()
+        return path
+
+    def stop(self):
+        with self._lock:
+            f, self._file = self._file, None
+        if f is not None:
+            f.close()
+
+    def now(self) -> float:
+        # Microsegundos desde el inicio de la traza
+        return (time.perf_counter() - self._origin) * 1e6
+
+    def lane(self) -> Tuple[int, int]:
+        # (pid, tid) del código actual: proveedor + hilo o tarea asyncio
+        provider = current_provider() or "Ploostream"
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        key = ("task", id(task)) if task is not None else ("thread", threading.get_ident())
+
+        with self._lock:
+            if self._file is None:
+                return 0, 0
+            pid = self._pids.get(provider)
+            if pid is None:
+                pid = self._pids[provider] = len(self._pids) + 1
+                self._write({"ph": "M", "name": "process_name", "pid": pid, "args": {"name": provider}})
+            tid = self._lanes.get((pid, key))
+            if tid is None:
+                tid = self._lanes[(pid, key)] = len(self._lanes) + 1
+                name = f"tarea {tid}" if task is not None else threading.current_thread().name
+                self._write({"ph": "M", "name": "thread_name", "pid": pid, "tid": tid, "args": {"name": name}})
+        return pid, tid
+
+    def complete(self, name: str, cat: str, start: float, end: float,
+                 lane: Optional[Tuple[int, int]] = None, **args):
+        if self._file is None:
+            return
+        pid, tid = lane or self.lane()
+        event = {"name": name, "cat": cat, "ph": "X", "ts": round(start, 1),
+                 "dur": round(max(0.0, end - start), 1), "pid": pid, "tid": tid}
+        if args:
+            event["args"] = args
+        with self._lock:
+            if self._file is not None:
+                self._write(event)
+
+    @contextlib.contextmanager
+    def span(self, name: str, cat: str, **args) -> Iterator[Dict[str, Any]]:
+        # Los args se pueden completar dentro del bloque (estado, tamaño...)
+        lane = self.lane()
+        start = self.now()
+        try:
+            yield args
+        except BaseException as e:
+            args.setdefault("error", type(e).__name__)
+            raise
+        finally:
+            self.complete(name, cat, start, self.now(), lane, **args)
+
+    def _write(self, event: dict):
+        self._file.write(json.dumps(event, ensure_ascii=False, separators=(",", ":")) + ",\n")
+        self._file.flush()
+
+
+tracer = Tracer()
+if TRACE_ENABLED:
+    tracer.start()
+
+
+def span(name: str, cat: str, **args):
+    if not tracer.enabled:
+        # Los args se pueden seguir rellenando aunque no se escriban
+        return contextlib.nullcontext({})
+    return tracer.span(name, cat, **args)
+
+
+# ------------------------------------------------------------
+# aiohttp: DNS, conexión y tiempo hasta la cabecera de respuesta
+# ------------------------------------------------------------
+def aiohttp_trace_config():
+    import aiohttp
+
+    async def on_request_start(session, ctx, params):
+        ctx.lane = tracer.lane()
+        ctx.start = tracer.now()
+
+    async def on_request_end(session, ctx, params):
+        tracer.complete(f"GET {params.url.host}", "http", ctx.start, tracer.now(), ctx.lane,
+                        url=str(params.url), status=params.response.status, fase="ttfb")
+
+    async def on_request_exception(session, ctx, params):
+        tracer.complete(f"GET {params.url.host}", "http", ctx.start, tracer.now(), ctx.lane,
+                        url=str(params.url), error=type(params.exception).__name__)
+
+    async def on_dns_start(session, ctx, params):
+        ctx.dns_start = tracer.now()
+
+    async def on_dns_end(session, ctx, params):
+        tracer.complete("dns", "net", ctx.dns_start, tracer.now(), ctx.lane, host=params.host)
+
+    async def on_connect_start(session, ctx, params):
+        ctx.connect_start = tracer.now()
+
+    async def on_connect_end(session, ctx, params):
+        tracer.complete("connect", "net", ctx.connect_start, tracer.now(), ctx.lane)
+
+    config = aiohttp.TraceConfig()
+    config.on_request_start.append(on_request_start)
+    config.on_request_end.append(on_request_end)
+    config.on_request_exception.append(on_request_exception)
+    config.on_dns_resolvehost_start.append(on_dns_start)
+    config.on_dns_resolvehost_end.append(on_dns_end)
+    config.on_connection_create_start.append(on_connect_start)
+    config.on_connection_create_end.append(on_connect_end)
+    return config
@@ -0,0 +1,66 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Tuple
+
+import pytest
+
+from scrapers.breaker import breakers
+
+# respond(n) -> (estado, cuerpo, segundos de espera); n empieza en 1
+Responder = Callable[[int], Tuple[int, bytes, float]]
+
+
+class LocalServer:
+    def __init__(self, respond: Responder, host: str):
+        self.calls: List[str] = []
+        self._lock = threading.Lock()
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with owner._lock:
+                    owner.calls.append(self.path)
+                    n = len(owner.calls)
+                status, body, delay = respond(n)
+                if delay:
+                    time.sleep(delay)
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://{host}:{self._server.server_port}/"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def http_server():
+    # Servidor HTTP local con respuestas programadas por número de petición
+    servers: List[LocalServer] = []
+
+    def start(respond: Responder, host: str = "127.0.0.1") -> LocalServer:
+        server = LocalServer(respond, host)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    # El registro de breakers es global: cada test empieza sin circuitos
+    monkeypatch.setattr(breakers, "_breakers", {})
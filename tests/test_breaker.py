@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+
+from scrapers import net
+from scrapers.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, breakers
+from scrapers.cancel import CancelToken
+from scrapers.context import current_provider
+
+
+def _open_breaker(breaker: CircuitBreaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == OPEN
+    breaker.opened_at -= breaker.reset_timeout
+
+
+def test_release_probe_reopens_without_counting_a_failure():
+    breaker = CircuitBreaker(("P", "host"), failure_threshold=2, reset_timeout=60)
+    _open_breaker(breaker)
+    failures = breaker.failures
+
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.release_probe()
+    assert breaker.state == OPEN
+    assert breaker.failures == failures
+    # La prueba no tuvo veredicto: la siguiente petición puede volver a probar
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+@pytest.fixture
+def slow_server(http_server):
+    return http_server(lambda n: (200, b"ok", 1), host="localhost").url
+
+
+def test_probe_cut_by_deadline_does_not_block_the_breaker(slow_server):
+    breaker = breakers.get(current_provider(), slow_server)
+    _open_breaker(breaker)
+
+    # La ejecución se cancela mientras la petición de prueba sigue en vuelo
+    token = CancelToken()
+    threading.Timer(0.2, token.cancel).start()
+    with token.activate(), pytest.raises(Exception):
+        net.get(slow_server, retries=0, timeout=0.5)
+
+    assert breaker.state == OPEN
+    assert not breaker._probing
+    assert breaker.allow()
+    breaker.record_success()
@@ -0,0 +1,55 @@
+import pytest
+
+from scrapers.canonical import canonicalize_events, clean_url, url_key
+from scrapers.models import Event, Stream
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("HTTPS://Example.COM:443/Path?a=1", "https://example.com/Path?a=1"),
+    ("http://example.com:80", "http://example.com/"),
+    ("http://example.com:8080/x", "http://example.com:8080/x"),
+    ("//cdn.example.com/embed/1", "https://cdn.example.com/embed/1"),
+    ("https://x.com/p?utm_source=tw&id=7&fbclid=abc#frag", "https://x.com/p?id=7"),
+    ("https://x.com/p?b=2&a=1", "https://x.com/p?b=2&a=1"),
+    ("http://[::1]:8080/x", "http://[::1]:8080/x"),
+    ("https://[2001:DB8::1]/x", "https://[2001:db8::1]/x"),
+])
+def test_clean_url(raw, expected):
+    assert clean_url(raw) == expected
+
+
+def test_clean_url_resolves_relative_against_base():
+    assert clean_url("/embed/2", "https://site.com/event/1") == "https://site.com/embed/2"
+
+
+@pytest.mark.parametrize("raw", ["http://a:b/x", "http://[abc/x"])
+def test_malformed_urls_are_returned_as_is(raw):
+    assert clean_url(raw) == raw
+    assert url_key(raw) == url_key(raw)
+
+
+def test_url_key_ignores_scheme_trailing_slash_and_query_order():
+    assert url_key("http://x.com/p/?a=1&b=2") == url_key("https://x.com/p?b=2&a=1")
+    assert url_key("https://x.com/p?a=1") != url_key("https://x.com/p?a=2")
+
+
+def _event(urls):
+    return Event(id="1", name="A vs B", url="https://site.com/event/1", league="L", home="A", away="B",
+                 start_time="", provider="P", streams=[Stream(name=str(i), url=u) for i, u in enumerate(urls)])
+
+
+def test_canonicalize_events_dedupes_and_keeps_malformed_streams():
+    event = _event([
+        "https://cdn.com/e/1?utm_medium=x",
+        "http://cdn.com/e/1/",
+        "/local/2",
+        "http://a:b/x",
+    ])
+    removed = canonicalize_events([event])
+
+    assert removed == 1
+    assert [s.url for s in event.streams] == [
+        "https://cdn.com/e/1",
+        "https://site.com/local/2",
+        "http://a:b/x",
+    ]
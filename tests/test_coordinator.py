@@ -0,0 +1,40 @@
+import asyncio
+import gc
+
+from scrapers.coordinator import SingleFlight
+
+
+def test_failed_flight_with_cancelled_waiter_is_not_reported_as_lost():
+    async def fail():
+        await asyncio.sleep(0.05)
+        raise OSError("conexión cerrada")
+
+    async def main():
+        errors = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, ctx: errors.append(ctx))
+        flight = SingleFlight()
+        waiter = asyncio.ensure_future(flight.do_async("k", fail))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.sleep(0.1)
+        flight = waiter = None
+        gc.collect()
+        return errors
+
+    assert asyncio.run(main()) == []
+
+
+def test_waiters_share_one_call():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    async def main():
+        flight = SingleFlight()
+        return await asyncio.gather(*(flight.do_async("k", fetch) for _ in range(3)))
+
+    assert asyncio.run(main()) == ["ok"] * 3
+    assert calls == [1]
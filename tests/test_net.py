@@ -0,0 +1,58 @@
+import pytest
+import requests
+
+from scrapers import net
+from scrapers.breaker import breakers
+from scrapers.context import current_provider
+from scrapers.metrics import HTTP_RETRY_TOTAL
+
+
+@pytest.fixture
+def flaky_server(http_server):
+    # Responde 503 las dos primeras veces y 200 después
+    return http_server(lambda n: (503, b"busy", 0) if n <= 2 else (200, b"ok", 0))
+
+
+def test_get_retries_retryable_status(flaky_server, monkeypatch):
+    url, calls = flaky_server.url, flaky_server.calls
+    monkeypatch.setattr(net, "BACKOFF_BASE", 0.01)
+    before = HTTP_RETRY_TOTAL.samples().get(("127.0.0.1",), 0)
+
+    resp = net.get(url, retries=2, timeout=5)
+
+    assert resp.status_code == 200
+    assert resp.text == "ok"
+    assert len(calls) == 3
+    assert HTTP_RETRY_TOTAL.samples().get(("127.0.0.1",), 0) - before == 2
+    assert breakers.get(current_provider(), url).allow()
+
+
+def test_get_returns_last_response_when_retries_run_out(flaky_server, monkeypatch):
+    url, calls = flaky_server.url, flaky_server.calls
+    monkeypatch.setattr(net, "BACKOFF_BASE", 0.01)
+
+    resp = net.get(url, retries=1, timeout=5)
+
+    assert resp.status_code == 503
+    assert len(calls) == 2
+
+
+def test_read_timeout_is_not_retried(http_server):
+    server = http_server(lambda n: (200, b"ok", 1))
+
+    with pytest.raises(requests.ReadTimeout):
+        net.get(server.url, retries=2, timeout=0.2)
+    assert len(server.calls) == 1
+
+
+def test_each_failed_attempt_counts_towards_the_breaker(http_server, monkeypatch):
+    monkeypatch.setattr(net, "BACKOFF_BASE", 0.01)
+    server = http_server(lambda n: (503, b"busy", 0))
+    breaker = breakers.get(current_provider(), server.url)
+
+    resp = net.get(server.url, retries=5, timeout=5)
+
+    # Se deja de reintentar en cuanto el circuito se abre
+    assert resp.status_code == 503
+    assert len(server.calls) == breaker.failure_threshold
+    assert not breaker.allow()
@@ -0,0 +1,42 @@
+import pytest
+
+from scrapers import aio
+from scrapers.context import provider_scope
+from scrapers.models import Event, Stream
+from scrapers.probe import HEALTH_DEAD, HEALTH_OK, StreamProber
+from scrapers.progress import PROBE, progress
+
+
+@pytest.fixture(autouse=True)
+def close_probe_session():
+    yield
+    aio.close_sessions()
+
+
+def _event(urls):
+    return Event(id="1", name="A vs B", url="", league="L", home="A", away="B", start_time="",
+                 provider="P", streams=[Stream(name=str(i), url=u) for i, u in enumerate(urls)])
+
+
+def test_probe_stage_advances_once_per_distinct_url(http_server):
+    ok = http_server(lambda n: (200, b"ok", 0)).url
+    dead = http_server(lambda n: (404, b"", 0)).url
+    events = [_event([ok, dead]), _event([ok])]
+    prober = StreamProber(timeout=2)
+
+    with provider_scope("probe-test"):
+        progress.begin(PROBE)
+        prober.annotate(events)
+        stage = next(p for p in progress.stages("probe-test") if p.stage == PROBE)
+        progress.reset("probe-test")
+
+    assert (stage.total, stage.done) == (2, 2)
+    assert [s.health for s in events[0].streams] == [HEALTH_OK, HEALTH_DEAD]
+
+    # Segunda pasada desde la caché: también cuenta como sondeada
+    with provider_scope("probe-test"):
+        progress.begin(PROBE)
+        prober.annotate(events)
+        stage = next(p for p in progress.stages("probe-test") if p.stage == PROBE)
+        progress.reset("probe-test")
+    assert (stage.total, stage.done) == (2, 2)
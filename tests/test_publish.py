@@ -0,0 +1,88 @@
+import itertools
+import json
+import threading
+import time
+
+from scrapers.models import Event
+from scrapers.publish import FileSink, Publisher, Sink
+
+
+def _events(n):
+    return [Event(id=str(i), name=f"A vs B {i}", url="", league="L", home="A", away="B",
+                  start_time="", provider="P", streams=[]) for i in range(n)]
+
+
+class SlowSink(Sink):
+    name = "slow"
+    # Cada instancia es un destino distinto, con su propia cola
+    _ids = itertools.count()
+
+    def __init__(self, delay):
+        super().__init__(timeout=5, retries=0)
+        self.delay = delay
+        self.sent = []
+        self.label = f"slow-{next(self._ids)}"
+
+    def send(self, events, payload, token):
+        time.sleep(self.delay)
+        self.sent.append(len(events))
+        return 0
+
+
+def test_slow_sink_does_not_delay_the_others(tmp_path):
+    slow = SlowSink(0.5)
+    path = tmp_path / "eventos.ndjson"
+    publisher = Publisher([slow, FileSink(str(path))], log=lambda _: None)
+
+    inicio = time.monotonic()
+    assert publisher.publish(_events(2), wait=False) == {}
+    assert time.monotonic() - inicio < 0.2
+
+    deadline = time.monotonic() + 0.3
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ["0", "1"]
+    assert slow.sent == []
+
+
+def test_queued_publications_collapse_to_the_latest():
+    slow = SlowSink(0.3)
+    publisher = Publisher([slow], log=lambda _: None)
+
+    publisher.publish(_events(1), wait=False)
+    time.sleep(0.05)
+    for n in (2, 3):
+        publisher.publish(_events(n), wait=False)
+    assert publisher.publish(_events(4)) == {"slow": True}
+    # La primera ya estaba en curso; la 2 y la 3 quedaron obsoletas en la cola
+    assert slow.sent == [1, 4]
+
+
+def test_superseded_publication_is_not_reported_as_sent():
+    slow = SlowSink(0.3)
+    publisher = Publisher([slow], log=lambda _: None)
+    results = {}
+
+    publisher.publish(_events(1), wait=False)
+    waiter = threading.Thread(target=lambda: results.update(publisher.publish(_events(2))))
+    waiter.start()
+    time.sleep(0.05)
+    publisher.publish(_events(3), wait=False)
+    waiter.join(5)
+
+    assert results == {"slow": None}
+    assert publisher.publish(_events(4)) == {"slow": True}
+    assert slow.sent == [1, 3, 4]
+
+
+def test_wait_returns_each_sink_result(tmp_path):
+    class Broken(Sink):
+        name = "broken"
+
+        def send(self, events, payload, token):
+            raise OSError("disco lleno")
+
+    publisher = Publisher([Broken(retries=0), FileSink(str(tmp_path / "eventos.json"))], log=lambda _: None)
+    assert publisher.publish(_events(1)) == {"broken": False, "file": True}
+    assert json.loads((tmp_path / "eventos.json").read_text(encoding="utf-8"))[0]["id"] == "0"
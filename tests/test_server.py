@@ -0,0 +1,69 @@
+import asyncio
+
+from scrapers.models import Event, Stream
+from scrapers.server import ChangeFeed
+
+
+def _event(n, streams=()):
+    return Event(id=str(n), name=f"A vs B {n}", url=f"https://site.com/{n}", league="L", home="A", away="B",
+                 start_time="", provider="P", streams=[Stream(name=s, url=f"https://cdn.com/{s}") for s in streams])
+
+
+def test_since_resumes_after_last_seen_id():
+    feed = ChangeFeed()
+    feed.update([_event(1)])
+    cursor = feed.last_id
+    feed.update([_event(1), _event(2, ["a"])])
+
+    frames = feed.since(cursor)
+    assert len(frames) == 1
+    assert b"event: event.add" in frames[0]
+    assert f"id: {feed.event_id(feed.last_id)}".encode() in frames[0]
+    assert feed.since(feed.last_id) == []
+
+
+def test_since_asks_for_snapshot_when_out_of_history():
+    feed = ChangeFeed(backlog=2)
+    for n in range(1, 5):
+        feed.update([_event(i) for i in range(1, n + 1)])
+
+    assert feed.since(0) is None
+    # Id por delante del contador: cliente de otra ejecución del servidor
+    assert feed.since(feed.last_id + 10) is None
+
+
+def test_ids_from_a_previous_server_run_are_rejected():
+    old = ChangeFeed()
+    old.update([_event(1)])
+    stale = old.event_id(old.last_id)
+
+    feed = ChangeFeed()
+    feed.epoch = old.epoch + "x"
+    assert feed.parse_id(stale) is None
+    assert feed.parse_id(feed.event_id(0)) == 0
+    assert feed.parse_id("basura") is None
+    assert feed.parse_id(None) is None
+
+
+def test_stream_sends_snapshot_to_client_from_previous_run():
+    from aiohttp.test_utils import TestClient, TestServer
+    from scrapers.server import create_app
+
+    feed = ChangeFeed()
+    feed.update([_event(1), _event(2)])
+
+    async def main():
+        client = TestClient(TestServer(create_app(feed)))
+        await client.start_server()
+        try:
+            resp = await client.get("/events/stream", headers={"Last-Event-ID": "0-99"})
+            data = b""
+            while b"event: snapshot" not in data or not data.endswith(b"\n\n"):
+                data += await asyncio.wait_for(resp.content.readany(), 5)
+            resp.close()
+        finally:
+            await client.close()
+        return data
+
+    data = asyncio.run(main())
+    assert f"id: {feed.event_id(feed.last_id)}\nevent: snapshot".encode() in data
@@ -0,0 +1,35 @@
+import pytest
+
+from scrapers.base import BaseProvider
+from scrapers.coordinator import RunCoordinator
+from scrapers.metrics import RUNS
+from scrapers.models import Event
+from scrapers.service import ScraperService
+
+
+class StubProvider(BaseProvider):
+    def __init__(self, name, events):
+        self.name = name
+        self.events = events
+
+    def fetch_events(self):
+        return list(self.events)
+
+
+def _runs(provider, result):
+    return RUNS.samples().get((provider, result), 0)
+
+
+@pytest.mark.parametrize("events, result", [
+    ([Event(id="1", name="A vs B", url="", league="L", home="A", away="B", start_time="", provider="P",
+            streams=[])], "ok"),
+    ([], "empty"),
+])
+def test_run_result_depends_on_returned_events(events, result):
+    name = f"stub-{result}"
+    service = ScraperService([StubProvider(name, events)], coordinator=RunCoordinator())
+    before = _runs(name, result)
+
+    assert service.fetch_provider(service.providers[0]) == events
+    assert _runs(name, result) == before + 1
+    assert _runs(name, "ok" if result == "empty" else "empty") == 0